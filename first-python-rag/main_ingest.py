@@ -5,40 +5,55 @@ Configuration is loaded from config.ini file.
 """
 
 import asyncio
+import hashlib
+import math
+import numpy as np
+import orjson
+import os
+import pickle
+import queue
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from tqdm import tqdm
 import logging
-from datetime import datetime
-import configparser
-
-# Load configuration
-config = configparser.ConfigParser()
-config.read('config.ini')
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from parser.hierarchy_scanner import build_project_map
-from parser.java_parser import JavaCodeParser
-from embedding.enricher import CodeEnricher
-from database.vector_store import VectorStore
-
+from config import load_config
+from parser.hierarchy_scanner import build_project_map, find_java_files, recycling_pool_context
+from parser.java_parser import JavaCodeParser, init_parse_worker, parse_file_worker
 
-# Configure logging from config
-log_file = config.get('Logging', 'ingestion_log', fallback='ingestion.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+# Parse workers started with spawn re-import this module, so it stays free of
+# side effects: logging is configured in main(), and the enricher and vector
+# store (OpenAI, LanceDB/pyarrow) are imported when the pipeline builds them
 logger = logging.getLogger(__name__)
 
 
+def _content_hash(chunk: Dict[str, Any], prefix: str = "") -> bytes:
+    """
+    Fast content key for a chunk: identical signature + body with the same
+    inherited methods share enrichment. The class name and fields are left
+    out so getX/setX boilerplate repeated across classes is enriched once.
+    
+    Args:
+        chunk: Parsed code chunk
+        prefix: Enrichment model + prompt version, so changing either
+            invalidates earlier cached summaries
+    """
+    inherited = '\x1f'.join((chunk.get('class_info') or {}).get('inherited_methods', ()))
+    content = (
+        f"{prefix}\0{inherited}\0"
+        f"{chunk.get('method_signature', '')}\0{chunk.get('method_body', '')}"
+    )
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
 class IngestionPipeline:
     """
     Two-pass ingestion pipeline for Java codebase.
@@ -51,7 +66,13 @@ class IngestionPipeline:
         root_path: str,
         batch_size: int = 20,
         db_path: str = "./data/lancedb",
-        mock_enrichment: bool = False
+        mock_enrichment: bool = False,
+        max_workers: int = 4,
+        write_batch_size: int = 1000,
+        parse_workers: Optional[int] = None,
+        enrich_concurrency: int = 8,
+        incremental: bool = True,
+        model_path: Optional[str] = None
     ):
         """
         Initialize ingestion pipeline.
@@ -61,26 +82,80 @@ class IngestionPipeline:
             batch_size: Number of chunks per batch
             db_path: Path to vector database
             mock_enrichment: Use mock enrichment (no API calls)
+            max_workers: Number of concurrent enrichment workers
+            write_batch_size: Number of enriched chunks per database write
+            parse_workers: Number of parser processes (None = one per CPU)
+            enrich_concurrency: Micro-batches (concurrent enrich_batch calls) per buffer
+            incremental: Only re-index files changed since the previous run
+            model_path: Local Jina V3 model (None = jina_model_path from config)
         """
         self.root_path = Path(root_path)
         self.batch_size = batch_size
         self.db_path = db_path
+        self.model_path = model_path or load_config().jina_model_path
         self.mock_enrichment = mock_enrichment
+        self.max_workers = max_workers
+        self.write_batch_size = write_batch_size
+        self.write_flush_interval = 5.0  # seconds idle before a partial write
+        self.optimize_every = 10_000  # chunks written between compactions
+        self._chunks_at_last_optimize = 0
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.parse_tasks_per_worker = 5000  # files parsed before a worker is replaced
+        self.enrich_concurrency = enrich_concurrency
+        
+        # Enrichment reuse for duplicate chunks: content hash -> enrichment,
+        # plus futures for hashes currently being enriched
+        self.enrichment_cache_path = Path(db_path).parent / "enrichment_cache.pkl"
+        self._enrichment_cache: Dict[bytes, Dict[str, Any]] = {}
+        self._enrich_pending: Dict[bytes, asyncio.Future] = {}
+        self._persist_enrichments = False  # Set by init_enricher
+        self.cache_checkpoint_every = 2000  # new enrichments between cache saves
+        self._cache_size_at_checkpoint = 0
+        
+        # Incremental ingestion: file path -> {mtime_ns, size, sha1, classes}
+        # from the last successful run, stored alongside the database
+        self.incremental = incremental
+        self.manifest_path = Path(db_path) / "manifest.json"
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._pending_manifest: Dict[str, Dict[str, Any]] = {}
+        self._failed_files = set()
+        # Chunks parsed vs written per file; a file only enters the manifest
+        # once every chunk it produced is in the database
+        self._parsed_chunks: Dict[str, int] = {}
+        self._stored_chunks: Dict[str, int] = {}
+        
+        # Hierarchy map and Java files from phase 1, kept so neither the JSON
+        # nor the project tree is read twice
+        self._hierarchy_map: Optional[Dict[str, Any]] = None
+        self._java_files: Optional[List[Path]] = None
         
         # Statistics
         self.stats = {
             'files_processed': 0,
             'files_failed': 0,
             'chunks_indexed': 0,
-            'total_files': 0
+            'chunks_deduplicated': 0,
+            'files_unchanged': 0,
+            'total_files': 0,     # Java files found in the project
+            'files_to_process': 0  # After incremental filtering
         }
         
         # Error log from config
-        error_log_file = config.get('Logging', 'error_log', fallback='ingestion_errors.log')
-        self.error_log_path = Path(error_log_file)
+        self.error_log_path = Path(load_config().error_log)
+        
+        # Buffered error log handle, opened on first error and shared by the
+        # event loop and writer thread (guarded by a lock)
+        self._error_fh = None
+        self._error_lock = threading.Lock()
         
         # Components (initialized later)
         self.parser = None
+        self._hierarchy_shm = None
+        self._hierarchy_size = 0
+        self._write_q = None
+        self._embed_thread = None
+        self._db_q = None
+        self._writer_thread = None
         self.enricher = None
         self.vector_store = None
     
@@ -100,12 +175,18 @@ class IngestionPipeline:
         logger.info(f"Scanning project: {self.root_path}")
         logger.info(f"Output file: {hierarchy_file}")
         
+        # Walk the project once; phase 2 reuses the same file list
+        self._java_files = self.find_java_files()
+        
         # Build hierarchy map
         hierarchy_map = build_project_map(
             str(self.root_path),
-            str(hierarchy_file)
+            str(hierarchy_file),
+            cache_dir=load_config().cache_dir,
+            java_files=self._java_files
         )
         
+        self._hierarchy_map = hierarchy_map
         logger.info(f"✓ Phase 1 Complete: Hierarchy map built with {len(hierarchy_map)} classes")
         
         return hierarchy_file
@@ -119,30 +200,237 @@ class IngestionPipeline:
         """
         logger.info("\nInitializing components...")
         
-        # Initialize parser with hierarchy context
-        self.parser = JavaCodeParser(hierarchy_map_path=str(hierarchy_file))
-        logger.info("✓ Parser initialized with hierarchy map")
-        
-        # Initialize enricher
-        self.enricher = CodeEnricher(mock_mode=self.mock_enrichment)
-        logger.info(f"✓ Enricher initialized (mock_mode={self.mock_enrichment})")
+        # Load the hierarchy map once and publish it to parse workers
+        # through shared memory (pickled, so workers skip JSON decoding).
+        # After phase 1 the map is already in memory; the file is only
+        # read when components are initialized on their own.
+        hierarchy_map = self._hierarchy_map
+        if hierarchy_map is None:
+            try:
+                hierarchy_map = orjson.loads(hierarchy_file.read_bytes())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load hierarchy map {hierarchy_file}: {e}")
+                hierarchy_map = {}
+        
+        # Initialize parser with hierarchy context (interns the map's names,
+        # so the pickled copy stores each repeated name once)
+        self.parser = JavaCodeParser(hierarchy_map=hierarchy_map)
+        logger.info(f"✓ Parser initialized with hierarchy map ({len(hierarchy_map)} classes)")
+        
+        blob = pickle.dumps(hierarchy_map, protocol=pickle.HIGHEST_PROTOCOL)
+        self._hierarchy_shm = shared_memory.SharedMemory(create=True, size=max(len(blob), 1))
+        self._hierarchy_shm.buf[:len(blob)] = blob
+        self._hierarchy_size = len(blob)
+        
+        # Heavy client library, imported only by the process that runs the pipeline
+        from database.vector_store import VectorStore
+        
+        self.init_enricher()
+        
+        # Reuse enrichments from previous real (non-mock) runs
+        if self._persist_enrichments:
+            self._load_enrichment_cache()
         
         # Initialize vector store
-        self.vector_store = VectorStore(db_path=self.db_path)
+        # Long runs amortize the compile cost; search keeps the eager model
+        self.vector_store = VectorStore(
+            db_path=self.db_path,
+            model_path=self.model_path,
+            compile_model=True
+        )
         logger.info(f"✓ Vector store initialized at {self.db_path}")
+        
+        # Embedding and writing run on separate threads so the encoder works
+        # on the next batch while LanceDB commits the previous one
+        self._write_q = queue.Queue(maxsize=4 * self.max_workers)
+        self._db_q = queue.Queue(maxsize=4)
+        self._embed_thread = threading.Thread(
+            target=self._embed_loop, name="embedder", daemon=True
+        )
+        # Start the single writer thread - the only code that touches the database
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="db-writer", daemon=True
+        )
+        self._embed_thread.start()
+        self._writer_thread.start()
+        logger.info("✓ Embedding and database writer threads started")
+    
+    def _release_hierarchy_shm(self):
+        """Free the shared-memory copy of the hierarchy map."""
+        if self._hierarchy_shm is not None:
+            self._hierarchy_shm.close()
+            self._hierarchy_shm.unlink()
+            self._hierarchy_shm = None
+    
+    def init_enricher(self):
+        """
+        Create the enricher. The on-disk enrichment cache is only used when it
+        really calls the API: without an API key the enricher falls back to
+        mock mode, and its placeholder summaries must never be reused.
+        """
+        from embedding.enricher import CodeEnricher, PROMPT_VERSION
+        
+        self.enricher = CodeEnricher(mock_mode=self.mock_enrichment)
+        self._enrich_key_prefix = f"{self.enricher.model}\0{PROMPT_VERSION}"
+        self._persist_enrichments = not self.enricher.mock_mode
+        logger.info(f"✓ Enricher initialized (mock_mode={self.enricher.mock_mode})")
+    
+    def _load_enrichment_cache(self):
+        """Load the persisted content-hash -> enrichment cache, if present."""
+        try:
+            with open(self.enrichment_cache_path, 'rb') as f:
+                self._enrichment_cache = pickle.load(f)
+            logger.info(f"✓ Loaded {len(self._enrichment_cache)} cached enrichments")
+        except FileNotFoundError:
+            self._enrichment_cache = {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable enrichment cache: {e}")
+            self._enrichment_cache = {}
+        self._cache_size_at_checkpoint = len(self._enrichment_cache)
+    
+    def _save_enrichment_cache(self):
+        """Persist the enrichment cache atomically for incremental re-runs."""
+        try:
+            self.enrichment_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.enrichment_cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self._enrichment_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.enrichment_cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save enrichment cache: {e}")
     
     def find_java_files(self) -> List[Path]:
         """
         Recursively find all .java files in project.
+        Uses the hierarchy scanner's walker, so these paths are the same
+        strings as the file tags in the hierarchy map.
         
         Returns:
             List of Java file paths
         """
         logger.info(f"\nScanning for Java files in: {self.root_path}")
-        java_files = list(self.root_path.rglob("*.java"))
+        java_files = find_java_files(self.root_path)
         logger.info(f"Found {len(java_files)} Java files")
         return java_files
     
+    def plan_incremental(self, java_files: List[Path]) -> Tuple[List[Path], List[str]]:
+        """
+        Compare files against the manifest from the previous run.
+        Files whose size and mtime are unchanged are skipped without reading;
+        otherwise a SHA-1 of the content decides whether they really changed.
+        Subclasses of classes in changed or removed files are re-indexed too,
+        since their inherited-method context comes from the superclass.
+        
+        Args:
+            java_files: All Java files currently in the project
+            
+        Returns:
+            Tuple of (files to process, file paths whose old rows must be deleted)
+        """
+        try:
+            previous = orjson.loads(self.manifest_path.read_bytes())
+        except (OSError, ValueError):
+            previous = {}
+        
+        # Classes declared per file and direct subclasses per class (simple
+        # names, as the parser resolves parents), from the phase 1 map
+        classes_by_file: Dict[str, List[str]] = {}
+        files_by_class: Dict[str, List[str]] = {}
+        subclasses: Dict[str, List[str]] = {}
+        for class_name, info in (self._hierarchy_map or {}).items():
+            simple_name = info.get('simple_name') or class_name.rsplit('.', 1)[-1]
+            if info.get('file'):
+                classes_by_file.setdefault(info['file'], []).append(simple_name)
+                files_by_class.setdefault(simple_name, []).append(info['file'])
+            if info.get('parent'):
+                subclasses.setdefault(info['parent'], []).append(simple_name)
+        
+        changed = []
+        current = set()
+        for file_path in java_files:
+            key = str(file_path)
+            classes = classes_by_file.get(key, [])
+            try:
+                stat = os.stat(key)
+                entry = previous.get(key)
+                if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                    self._manifest[key] = {**entry, 'classes': classes}
+                    current.add(key)
+                    continue
+                
+                new_entry = {
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'sha1': hashlib.sha1(file_path.read_bytes()).hexdigest(),
+                    'classes': classes
+                }
+            except OSError as e:
+                # Vanished or unreadable: drop its old rows, retry next run
+                self.log_error(file_path, e)
+                continue
+            
+            current.add(key)
+            if entry and entry['sha1'] == new_entry['sha1']:
+                # Touched but identical content
+                self._manifest[key] = new_entry
+                continue
+            
+            self._pending_manifest[key] = new_entry
+            changed.append(file_path)
+        
+        removed = [key for key in previous if key not in current]
+        
+        # Walk down the hierarchy from every class whose file changed or went away
+        roots = set()
+        for key in removed + [str(p) for p in changed]:
+            roots.update(previous.get(key, {}).get('classes', ()))
+            roots.update(classes_by_file.get(key, ()))
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            for subclass in subclasses.get(stack.pop(), ()):
+                if subclass not in seen:
+                    seen.add(subclass)
+                    stack.append(subclass)
+        
+        dependents = 0
+        for subclass in seen - roots:
+            # Simple names can repeat across packages, so re-queue every match
+            for key in files_by_class.get(subclass, ()):
+                if key in self._manifest:
+                    self._pending_manifest[key] = self._manifest.pop(key)
+                    changed.append(Path(key))
+                    dependents += 1
+        
+        # Drop rows for removed files and for every file about to be re-added
+        # (also clears partial rows from files that failed last time)
+        stale = removed + [str(p) for p in changed]
+        
+        self.stats['files_unchanged'] = len(current) - len(changed)
+        logger.info(
+            f"Incremental: {len(changed)} changed/new "
+            f"({dependents} for a changed superclass), "
+            f"{self.stats['files_unchanged']} unchanged, "
+            f"{len(removed)} removed"
+        )
+        return changed, stale
+    
+    def _save_manifest(self):
+        """Record fully indexed files and atomically replace the manifest."""
+        for key, entry in self._pending_manifest.items():
+            # Chunks dropped by enrichment or a failed write leave the counts short
+            parsed = self._parsed_chunks.get(key)
+            if key not in self._failed_files and parsed == self._stored_chunks.get(key, 0):
+                self._manifest[key] = entry
+        
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix('.tmp')
+            tmp_path.write_bytes(orjson.dumps(self._manifest))
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.warning(f"Could not save manifest: {e}")
+    
     def log_error(self, file_path: Path, error: Exception):
         """
         Log file processing error.
@@ -154,15 +442,31 @@ class IngestionPipeline:
         timestamp = datetime.now().isoformat()
         error_msg = f"[{timestamp}] {file_path}: {type(error).__name__}: {str(error)}\n"
         
-        with open(self.error_log_path, 'a', encoding='utf-8') as f:
-            f.write(error_msg)
+        # Buffered write - no open/close per error; flushed in close_error_log()
+        with self._error_lock:
+            self._failed_files.add(str(file_path))
+            if self._error_fh is None:
+                self._error_fh = open(self.error_log_path, 'a', encoding='utf-8', buffering=1 << 16)
+            self._error_fh.write(error_msg)
         
         logger.error(f"Error processing {file_path.name}: {error}")
     
+    def close_error_log(self):
+        """Flush and close the buffered error log, if it was opened."""
+        with self._error_lock:
+            if self._error_fh is not None:
+                self._error_fh.close()
+                self._error_fh = None
+    
     async def phase2_ingestion_loop(self, java_files: List[Path]):
         """
         Phase 2: Parse, enrich, and index all files.
-        Uses Single Writer Pattern: parallel processing, sequential DB writes.
+        Runs as a three-stage pipeline connected by bounded queues:
+        parse (process pool) -> enrich (worker pool) -> write (writer thread).
+        Enriched batches stream straight to the writer, so memory stays flat
+        regardless of corpus size.
+        Stages overlap, so wall time approaches the slowest stage instead
+        of the sum of all three.
         
         Args:
             java_files: List of Java files to process
@@ -171,36 +475,93 @@ class IngestionPipeline:
         logger.info("PHASE 2: Ingestion Loop (Pass 2) - Single Writer Pattern")
         logger.info("=" * 80)
         
-        buffer = []
-        all_enriched_chunks = []  # Collect all enriched chunks
-        self.stats['total_files'] = len(java_files)
+        self.stats['files_to_process'] = len(java_files)
+        
+        # Bounded queues provide back-pressure between stages
+        parse_q = asyncio.Queue(maxsize=4 * self.batch_size)
+        
+        # Parsing is pure CPU, so spread it across processes to sidestep the GIL
+        # Workers are recycled every few thousand files so heap growth from
+        # large sources is returned to the OS (the hierarchy map is re-attached
+        # from shared memory by the initializer)
+        pool = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            initializer=init_parse_worker,
+            initargs=(self._hierarchy_shm.name, self._hierarchy_size),
+            mp_context=recycling_pool_context(),
+            max_tasks_per_child=self.parse_tasks_per_worker
+        )
+        with pool, \
+                tqdm(
+                    total=len(java_files),
+                    desc="Processing files",
+                    unit="file",
+                    mininterval=0.5,   # Throttle redraws on tiny-file projects
+                    miniters=100,
+                    smoothing=0.1
+                ) as pbar:
+            parse_task = asyncio.create_task(
+                self._parse_worker(java_files, pool, parse_q, pbar)
+            )
+            enrich_tasks = [
+                asyncio.create_task(self._enrich_worker(parse_q))
+                for _ in range(self.max_workers)
+            ]
+            
+            # Await every stage together: if one fails, nothing would drain
+            # (or feed) the bounded queue, so cancel the rest and re-raise
+            tasks = [parse_task, *enrich_tasks]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
         
-        # Process files with progress bar
-        with tqdm(total=len(java_files), desc="Processing files", unit="file") as pbar:
-            for file_path in java_files:
+        logger.info("\n✓ Phase 2 Complete: All files processed")
+    
+    async def _parse_worker(
+        self,
+        java_files: List[Path],
+        pool: ProcessPoolExecutor,
+        parse_q: asyncio.Queue,
+        pbar: tqdm
+    ):
+        """
+        Stage 1: Parse files in worker processes and feed chunks to enrichers.
+        Keeps a bounded window of files in flight and consumes results as
+        they complete. Sends one sentinel per enrich worker when done.
+        """
+        loop = asyncio.get_running_loop()
+        max_in_flight = 2 * self.parse_workers
+        in_flight = {}
+        files = iter(java_files)
+        
+        while True:
+            # Top up the window so every worker process stays busy
+            for file_path in files:
+                future = loop.run_in_executor(pool, parse_file_worker, str(file_path))
+                in_flight[future] = file_path
+                if len(in_flight) >= max_in_flight:
+                    break
+            
+            if not in_flight:
+                break
+            
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                file_path = in_flight.pop(future)
                 try:
-                    # Parse file
-                    chunks = self.parser.parse_file(str(file_path))
+                    chunks = future.result()
+                    self._parsed_chunks[str(file_path)] = len(chunks)
                     
                     # Add file path to chunks
                     for chunk in chunks:
                         chunk['file_path'] = str(file_path)
-                    
-                    # Add to buffer
-                    buffer.extend(chunks)
+                        await parse_q.put(chunk)
                     
                     self.stats['files_processed'] += 1
-                    
-                    # Flush buffer if full - but DON'T write to DB yet
-                    if len(buffer) >= self.batch_size:
-                        enriched = await self.flush_buffer(buffer)
-                        all_enriched_chunks.extend(enriched)  # Collect
-                        buffer = []
-                        
-                        # SINGLE WRITER: Write collected chunks sequentially
-                        if len(all_enriched_chunks) >= self.batch_size * 5:  # Write every 100 chunks
-                            self._write_to_db_sequential(all_enriched_chunks)
-                            all_enriched_chunks = []
                 
                 except Exception as e:
                     # Log error and continue
@@ -209,16 +570,104 @@ class IngestionPipeline:
                 
                 pbar.update(1)
         
-        # Flush remaining buffer
-        if buffer:
-            enriched = await self.flush_buffer(buffer)
-            all_enriched_chunks.extend(enriched)
-        
-        # SINGLE WRITER: Final write of all remaining chunks
-        if all_enriched_chunks:
-            self._write_to_db_sequential(all_enriched_chunks)
-        
-        logger.info("\n✓ Phase 2 Complete: All files processed")
+        # Only on success: on failure phase2_ingestion_loop cancels the enrichers
+        for _ in range(self.max_workers):
+            await parse_q.put(None)
+    
+    async def _enrich_worker(self, parse_q: asyncio.Queue):
+        """
+        Stage 2: Pull up to batch_size chunks, enrich them, stream to the writer.
+        Exits after receiving a sentinel (flushing any partial batch first).
+        """
+        done = False
+        
+        while not done:
+            buffer = []
+            while len(buffer) < self.batch_size:
+                chunk = await parse_q.get()
+                if chunk is None:
+                    done = True
+                    break
+                buffer.append(chunk)
+            
+            if buffer:
+                enriched = await self.flush_buffer(buffer)
+                if enriched:
+                    # Blocking put runs in a thread so a full queue only applies back-pressure
+                    await asyncio.to_thread(self._write_q.put, enriched)
+    
+    def _embed_loop(self):
+        """
+        EMBEDDER thread: coalesce streamed batches until the None sentinel.
+        Embeds when write_batch_size chunks are pending, or when the queue has
+        been idle for write_flush_interval seconds (time-based batching).
+        """
+        pending = []
+        
+        while True:
+            try:
+                enriched_chunks = self._write_q.get(timeout=self.write_flush_interval)
+            except queue.Empty:
+                # Idle - flush what we have rather than sit on it
+                pending = self._embed_pending(pending)
+                continue
+            
+            if enriched_chunks is None:
+                break
+            
+            pending.extend(enriched_chunks)
+            # Large writes amortize per-commit overhead in LanceDB
+            if len(pending) >= self.write_batch_size:
+                pending = self._embed_pending(pending)
+        
+        # Embed the remainder, then tell the writer to finish
+        self._embed_pending(pending)
+        self._db_q.put(None)
+    
+    def _embed_pending(self, pending: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Embed pending chunks and hand them to the writer; returns a fresh buffer."""
+        if pending:
+            try:
+                search_texts = [self.vector_store.build_search_text(c) for c in pending]
+                embeddings = self.vector_store.embed_texts(search_texts)
+                self._db_q.put((pending, embeddings))
+            except Exception as e:
+                # Never let the embedder thread die mid-run
+                logger.error(f"Embedding error: {e}")
+                for chunk in pending:
+                    self.log_error(Path(chunk.get('file_path', 'unknown')), e)
+        return []
+    
+    def _writer_loop(self):
+        """
+        SINGLE WRITER thread: write embedded batches until the None sentinel.
+        """
+        while True:
+            item = self._db_q.get()
+            if item is None:
+                break
+            
+            enriched_chunks, embeddings = item
+            try:
+                self._write_to_db_sequential(enriched_chunks, embeddings)
+                
+                # Compact periodically so long runs don't pile up tiny fragments
+                if self.stats['chunks_indexed'] - self._chunks_at_last_optimize >= self.optimize_every:
+                    self._chunks_at_last_optimize = self.stats['chunks_indexed']
+                    self.vector_store.optimize()
+            except Exception as e:
+                # Never let the writer thread die mid-run
+                logger.error(f"Writer thread error: {e}")
+    
+    def _stop_writer(self):
+        """Send the shutdown sentinel and wait for pending embeds and writes to finish."""
+        if self._embed_thread is not None:
+            self._write_q.put(None)
+            self._embed_thread.join()
+            self._embed_thread = None
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+            self._writer_thread = None
     
     async def flush_buffer(self, buffer: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -234,36 +683,133 @@ class IngestionPipeline:
         if not buffer:
             return []
         
+        loop = asyncio.get_running_loop()
+        reused = []
+        waiting = []
+        to_enrich = []
+        hashes = {}
+        
+        # Skip chunks whose content was already enriched (or is in flight)
+        for chunk in buffer:
+            content_hash = _content_hash(chunk, self._enrich_key_prefix)
+            if content_hash in self._enrichment_cache:
+                self._apply_enrichment(chunk, self._enrichment_cache[content_hash])
+                reused.append(chunk)
+            elif content_hash in self._enrich_pending:
+                waiting.append((chunk, self._enrich_pending[content_hash]))
+            else:
+                self._enrich_pending[content_hash] = loop.create_future()
+                hashes[id(chunk)] = content_hash
+                to_enrich.append(chunk)
+        
         try:
-            # Step A: Enrich chunks (parallel processing OK here)
-            enriched_chunks = await self.enricher.enrich_batch(buffer)
+            enriched_chunks = await self._enrich_chunks(to_enrich)
+            
+            # Remember real enrichments (not fallbacks) for duplicate content
+            for chunk in enriched_chunks:
+                if not chunk.get('enrichment_fallback'):
+                    self._enrichment_cache[hashes[id(chunk)]] = {
+                        'summary': chunk.get('summary'),
+                        'keywords': chunk.get('keywords', [])
+                    }
+        finally:
+            # Wake duplicates waiting on these hashes (None = no reusable result)
+            for content_hash in hashes.values():
+                self._enrich_pending.pop(content_hash).set_result(
+                    self._enrichment_cache.get(content_hash)
+                )
+        
+        for chunk, future in waiting:
+            enrichment = await future
+            if enrichment is not None:
+                self._apply_enrichment(chunk, enrichment)
+                reused.append(chunk)
+            else:
+                # Original enrichment failed - enrich this copy on its own
+                enriched_chunks.extend(await self._enrich_chunks([chunk]))
+        
+        # Checkpoint so a crashed or interrupted run doesn't pay for these again
+        if (self._persist_enrichments and
+                len(self._enrichment_cache) - self._cache_size_at_checkpoint >= self.cache_checkpoint_every):
+            self._cache_size_at_checkpoint = len(self._enrichment_cache)
+            self._save_enrichment_cache()
+        
+        self.stats['chunks_deduplicated'] += len(reused)
+        logger.debug(f"Enriched {len(enriched_chunks)} chunks, reused {len(reused)}")
+        return enriched_chunks + reused
+    
+    @staticmethod
+    def _apply_enrichment(chunk: Dict[str, Any], enrichment: Dict[str, Any]):
+        """Copy a cached enrichment onto a chunk."""
+        chunk['summary'] = enrichment['summary']
+        chunk['keywords'] = list(enrichment['keywords'])
+    
+    async def _enrich_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Enrich chunks, fanning out micro-batches so their API round-trips overlap.
+        
+        Args:
+            chunks: Parsed chunks needing enrichment
             
-            logger.debug(f"Enriched {len(enriched_chunks)} chunks")
-            return enriched_chunks
+        Returns:
+            Enriched chunks; not in input order, since enrich_batch groups
+            chunks by class (callers match results by chunk identity)
+        """
+        if not chunks:
+            return []
+        
+        # Step A: Enrich chunks (parallel processing OK here)
+        size = math.ceil(len(chunks) / self.enrich_concurrency)
+        splits = [chunks[i:i + size] for i in range(0, len(chunks), size)]
+        results = await asyncio.gather(*[self._enrich_micro_batch(mb) for mb in splits])
+        
+        return [chunk for result in results for chunk in result]
+    
+    async def _enrich_micro_batch(self, micro_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Enrich one slice of a buffer (API concurrency is capped by the
+        enricher's max_concurrent).
+        
+        Args:
+            micro_batch: Slice of parsed chunks
+            
+        Returns:
+            Enriched chunks (empty on error)
+        """
+        try:
+            return await self.enricher.enrich_batch(micro_batch)
         
         except Exception as e:
             logger.error(f"Error enriching buffer: {e}")
-            # Log each file in buffer
-            for chunk in buffer:
+            # Log each file in micro-batch
+            for chunk in micro_batch:
                 file_path = chunk.get('file_path', 'unknown')
                 self.log_error(Path(file_path), e)
             return []  # Return empty on error
     
-    def _write_to_db_sequential(self, enriched_chunks: List[Dict[str, Any]]):
+    def _write_to_db_sequential(
+        self,
+        enriched_chunks: List[Dict[str, Any]],
+        embeddings: Optional[np.ndarray] = None
+    ):
         """
         SINGLE WRITER: Write enriched chunks to database sequentially.
-        This method is called from main thread only - no concurrent writes.
+        This method is called from the writer thread only - no concurrent writes.
         
         Args:
             enriched_chunks: List of enriched chunks to write
+            embeddings: Precomputed vectors from the embedder thread (None = embed here)
         """
         if not enriched_chunks:
             return
         
         try:
             logger.info(f"Writing {len(enriched_chunks)} chunks to database (sequential write)...")
-            self.vector_store.add_batch(enriched_chunks)
+            self.vector_store.add_batch(enriched_chunks, embeddings=embeddings)
             self.stats['chunks_indexed'] += len(enriched_chunks)
+            for chunk in enriched_chunks:
+                key = chunk.get('file_path')
+                self._stored_chunks[key] = self._stored_chunks.get(key, 0) + 1
             logger.info(f"✓ Successfully wrote {len(enriched_chunks)} chunks")
         
         except Exception as e:
@@ -285,19 +831,51 @@ class IngestionPipeline:
         logger.info(f"Start time: {start_time}")
         logger.info(f"Project root: {self.root_path}")
         logger.info(f"Batch size: {self.batch_size}")
+        logger.info(f"Parse workers: {self.parse_workers}")
+        logger.info(f"Enrich workers: {self.max_workers}")
+        logger.info(f"Write batch size: {self.write_batch_size}")
         logger.info(f"Mock enrichment: {self.mock_enrichment}")
         
         # Phase 1: Hierarchy Scan
         hierarchy_file = self.phase1_hierarchy_scan()
         
-        # Initialize components
-        self.initialize_components(hierarchy_file)
-        
-        # Find all Java files
-        java_files = self.find_java_files()
-        
-        # Phase 2: Ingestion Loop
-        await self.phase2_ingestion_loop(java_files)
+        # Release the writer threads, shared memory, HTTP client and error log
+        # however the rest of the run ends, including a failed initialization
+        # (e.g. a wrong jina_model_path)
+        try:
+            # Initialize components
+            self.initialize_components(hierarchy_file)
+            
+            # Java files found in phase 1
+            java_files = self._java_files
+            self.stats['total_files'] = len(java_files)
+            
+            # Skip unchanged files and clear rows for modified/removed ones
+            if self.incremental:
+                java_files, stale_paths = self.plan_incremental(java_files)
+                self.vector_store.delete_files(stale_paths)
+            
+            # Phase 2: Ingestion Loop
+            await self.phase2_ingestion_loop(java_files)
+        finally:
+            self._stop_writer()
+            self._release_hierarchy_shm()
+            self.close_error_log()
+            if self.enricher is not None:
+                await self.enricher.aclose()
+            # Keep paid-for enrichments even if the run failed part-way
+            if self._persist_enrichments:
+                self._save_enrichment_cache()
+        
+        if self.incremental:
+            self._save_manifest()
+        
+        # Compact fragments from the bulk load; writes are done, so drop
+        # every old version
+        try:
+            self.vector_store.optimize(cleanup_older_than=timedelta(0))
+        except Exception as e:
+            logger.warning(f"Post-ingest optimize failed: {e}")
         
         # Print final report
         end_time = datetime.now()
@@ -308,9 +886,12 @@ class IngestionPipeline:
         logger.info("=" * 80)
         logger.info(f"Duration: {duration}")
         logger.info(f"Total Files Scanned: {self.stats['total_files']}")
+        logger.info(f"Files Unchanged (skipped): {self.stats['files_unchanged']}")
+        logger.info(f"Files To Process (changed/new): {self.stats['files_to_process']}")
         logger.info(f"Files Processed Successfully: {self.stats['files_processed']}")
         logger.info(f"Files Failed: {self.stats['files_failed']}")
         logger.info(f"Chunks Indexed: {self.stats['chunks_indexed']}")
+        logger.info(f"Chunks Deduplicated: {self.stats['chunks_deduplicated']}")
         
         # Database stats
         db_stats = self.vector_store.get_stats()
@@ -322,27 +903,48 @@ class IngestionPipeline:
         logger.info("=" * 80)
 
 
+def _configure_logging(log_file: str):
+    """Log to the console and to the ingestion log file."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+
 async def main():
     """Main entry point - reads configuration from config.ini."""
     
-    # Read configuration from config.ini
-    PROJECT_ROOT = config.get('Paths', 'project_root')
-    BATCH_SIZE = config.getint('Ingestion', 'batch_size', fallback=20)
-    DB_PATH = config.get('Paths', 'database_path', fallback='./data/lancedb')
-    MOCK_ENRICHMENT = config.getboolean('Ingestion', 'mock_enrichment', fallback=False)
+    # Length-sorted embedding batches have a different shape every time;
+    # expandable segments let the CUDA caching allocator grow one mapping
+    # instead of fragmenting a new block per shape. Must be set before torch
+    # is imported (VectorStore imports it lazily); a user setting still wins.
+    os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
+    
+    # Read configuration from config.ini (parsed once, cached)
+    config = load_config()
+    _configure_logging(config.ingestion_log)
     
     # Validate project root exists
-    if not Path(PROJECT_ROOT).exists():
-        logger.error(f"Project root does not exist: {PROJECT_ROOT}")
+    if not config.project_root or not Path(config.project_root).exists():
+        logger.error(f"Project root does not exist: {config.project_root}")
         logger.error("Please update 'project_root' in config.ini")
         return
     
     # Create pipeline
     pipeline = IngestionPipeline(
-        root_path=PROJECT_ROOT,
-        batch_size=BATCH_SIZE,
-        db_path=DB_PATH,
-        mock_enrichment=MOCK_ENRICHMENT
+        root_path=config.project_root,
+        batch_size=config.batch_size,
+        db_path=config.database_path,
+        mock_enrichment=config.mock_enrichment,
+        max_workers=config.max_workers,
+        write_batch_size=config.write_batch_size,
+        enrich_concurrency=config.enrich_concurrency,
+        incremental=config.incremental,
+        model_path=config.jina_model_path
     )
     
     # Run pipeline
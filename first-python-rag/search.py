@@ -6,26 +6,29 @@ Configuration is loaded from config.ini file.
 
 import sys
 import asyncio
+import heapq
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-import json
+import httpx
+import orjson
+import re
 from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
-import configparser
 
 # Load environment variables
 load_dotenv()
 
-# Load configuration
-config = configparser.ConfigParser()
-config.read('config.ini')
-
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
+from config import load_config
 from database.vector_store import VectorStore
 
+# Summary segment of a search_text ("Summary: ... | Keywords: ...")
+_SUMMARY_RE = re.compile(r'Summary:\s*([^|]*)')
+
 
 class CodeSearchEngine:
     """
@@ -36,7 +39,8 @@ class CodeSearchEngine:
         self,
         db_path: str = "./data/lancedb",
         use_query_expansion: bool = True,
-        model: str = "gpt-4o-mini"
+        model: str = "gpt-4o-mini",
+        model_path: Optional[str] = None
     ):
         """
         Initialize search engine.
@@ -45,20 +49,34 @@ class CodeSearchEngine:
             db_path: Path to vector database
             use_query_expansion: Enable LLM query expansion
             model: OpenAI model for query expansion
+            model_path: Local Jina V3 model (None = jina_model_path from config)
         """
         self.db_path = db_path
         self.use_query_expansion = use_query_expansion
         self.model = model
         
+        # LRU cache of query -> expanded variations (avoids repeat API calls)
+        self._expand_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._expand_cache_size = 256
+        
         # Initialize vector store
         print("Initializing search engine...")
-        self.vector_store = VectorStore(db_path=db_path)
+        self.vector_store = VectorStore(
+            db_path=db_path,
+            model_path=model_path or load_config().jina_model_path
+        )
         
         # Initialize OpenAI client for query expansion
+        self._http = None
         if use_query_expansion:
             api_key = os.getenv("OPENAI_API_KEY")
             if api_key:
-                self.openai_client = AsyncOpenAI(api_key=api_key)
+                # Pooled keep-alive connections stay warm across expand_query calls
+                self._http = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                    timeout=httpx.Timeout(30.0)
+                )
+                self.openai_client = AsyncOpenAI(api_key=api_key, http_client=self._http)
                 print("✓ Query expansion enabled")
             else:
                 print("⚠️  No API key found, query expansion disabled")
@@ -68,6 +86,12 @@ class CodeSearchEngine:
         stats = self.vector_store.get_stats()
         print(f"✓ Connected to database: {stats['count']} code chunks indexed")
     
+    async def aclose(self):
+        """Close the pooled HTTP client used for query expansion."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     async def expand_query(self, query: str) -> List[str]:
         """
         Expand user query into multiple variations using LLM.
@@ -81,6 +105,11 @@ class CodeSearchEngine:
         if not self.use_query_expansion:
             return [query]
         
+        # Serve repeated queries from the cache
+        if query in self._expand_cache:
+            self._expand_cache.move_to_end(query)
+            return list(self._expand_cache[query])
+        
         prompt = f"""You are helping expand a search query for a Java code search engine.
 
 Original query: "{query}"
@@ -114,7 +143,7 @@ Example:
             # Parse JSON response
             try:
                 # Handle both array and object responses
-                parsed = json.loads(content)
+                parsed = orjson.loads(content)
                 if isinstance(parsed, list):
                     variations = parsed
                 elif isinstance(parsed, dict):
@@ -127,9 +156,16 @@ Example:
                 if query not in variations:
                     variations.insert(0, query)
                 
-                return variations[:3]  # Limit to 3 variations
+                variations = variations[:3]  # Limit to 3 variations
+                
+                # Remember successful expansions, evicting the least recently used
+                self._expand_cache[query] = variations
+                if len(self._expand_cache) > self._expand_cache_size:
+                    self._expand_cache.popitem(last=False)
                 
-            except json.JSONDecodeError:
+                return list(variations)
+                
+            except orjson.JSONDecodeError:
                 print(f"⚠️  Failed to parse query expansion, using original")
                 return [query]
         
@@ -159,25 +195,28 @@ Example:
         # Expand query if enabled
         if expand and self.use_query_expansion:
             print("   Expanding query...")
-            queries = await self.expand_query(query)
+            # Search with the original query while the LLM expands it
+            expand_task = asyncio.create_task(self.expand_query(query))
+            base_task = asyncio.create_task(self._search_variation(query, limit))
+            queries, base_results = await asyncio.gather(expand_task, base_task)
+            
             print(f"   Variations: {len(queries)}")
             for i, q in enumerate(queries, 1):
                 print(f"     {i}. \"{q}\"")
+            
+            # Search the remaining variations with one batched query
+            extra_results = await self._search_variations(
+                [q for q in queries if q != query], limit
+            )
+            result_sets = [base_results, *extra_results]
         else:
-            queries = [query]
+            result_sets = [await self._search_variation(query, limit)]
         
-        # Search with all query variations and combine results
+        # Combine results from all query variations
         all_results = []
         seen_ids = set()
         
-        for query_var in queries:
-            # Use retrieval.query task for query embedding
-            results = self.vector_store.search(
-                query_var,
-                limit=limit * 2,  # Get more to deduplicate
-                task="retrieval.query"
-            )
-            
+        for results in result_sets:
             # Add unique results
             for result in results:
                 result_id = result.get('id')
@@ -185,10 +224,47 @@ Example:
                     seen_ids.add(result_id)
                     all_results.append(result)
         
-        # Sort by distance (lower is better) and limit
-        all_results.sort(key=lambda x: x.get('_distance', float('inf')))
+        # Keep the closest results (lower distance is better) - O(N log limit)
+        return heapq.nsmallest(limit, all_results, key=lambda x: x.get('_distance', float('inf')))
+    
+    async def _search_variation(self, query_var: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Run one vector search off the event loop.
         
-        return all_results[:limit]
+        Args:
+            query_var: Query (or query variation) to search for
+            limit: Number of final results requested
+            
+        Returns:
+            Raw search results
+        """
+        # Use retrieval.query task for query embedding
+        return await asyncio.to_thread(
+            self.vector_store.search,
+            query_var,
+            limit=limit * 2,  # Get more to deduplicate
+            task="retrieval.query"
+        )
+    
+    async def _search_variations(self, queries: List[str], limit: int) -> List[List[Dict[str, Any]]]:
+        """
+        Run several vector searches off the event loop in one batch.
+        
+        Args:
+            queries: Query variations to search for
+            limit: Number of final results requested
+            
+        Returns:
+            Raw search results, one list per query
+        """
+        if not queries:
+            return []
+        return await asyncio.to_thread(
+            self.vector_store.batch_search,
+            queries,
+            limit=limit * 2,  # Get more to deduplicate
+            task="retrieval.query"
+        )
     
     def format_result(self, result: Dict[str, Any], rank: int) -> str:
         """
@@ -205,7 +281,7 @@ Example:
         metadata = result.get('metadata_parsed', {})
         if not metadata and 'metadata' in result:
             try:
-                metadata = json.loads(result['metadata'])
+                metadata = orjson.loads(result['metadata'])
             except:
                 metadata = {}
         
@@ -217,14 +293,9 @@ Example:
         dependencies = metadata.get('dependencies', [])
         inherited_methods = metadata.get('inherited_methods', [])
         
-        # Get summary from search_text or metadata
-        search_text = result.get('search_text', '')
-        summary = "No summary available"
-        if 'Summary:' in search_text:
-            summary_start = search_text.index('Summary:') + len('Summary:')
-            summary_end = search_text.find('|', summary_start)
-            if summary_end > 0:
-                summary = search_text[summary_start:summary_end].strip()
+        # Get summary from search_text
+        match = _SUMMARY_RE.search(result.get('search_text', ''))
+        summary = (match.group(1).strip() if match else '') or "No summary available"
         
         # Get code
         code = result.get('code', 'Code not available')
@@ -314,29 +385,34 @@ Result #{rank} - {method_name}
 async def main():
     """Main entry point - reads configuration from config.ini."""
     
-    # Read configuration from config.ini
-    DB_PATH = config.get('Paths', 'database_path', fallback='./data/lancedb')
-    USE_QUERY_EXPANSION = config.getboolean('Search', 'use_query_expansion', fallback=True)
-    SEARCH_LIMIT = config.getint('Search', 'search_results_limit', fallback=5)
+    # Query batches vary in shape; set before VectorStore imports torch
+    os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
+    
+    # Read configuration from config.ini (parsed once, cached)
+    config = load_config()
     
     # Create search engine
     search_engine = CodeSearchEngine(
-        db_path=DB_PATH,
-        use_query_expansion=USE_QUERY_EXPANSION
+        db_path=config.database_path,
+        use_query_expansion=config.use_query_expansion,
+        model_path=config.jina_model_path
     )
     
-    # Check if running with command line query
-    if len(sys.argv) > 1:
-        # Single query mode
-        query = " ".join(sys.argv[1:])
-        results = await search_engine.search(query, limit=SEARCH_LIMIT)
-        
-        print(f"\n📋 Found {len(results)} results:")
-        for i, result in enumerate(results, 1):
-            print(search_engine.format_result(result, i))
-    else:
-        # Interactive mode
-        await search_engine.interactive_search()
+    try:
+        # Check if running with command line query
+        if len(sys.argv) > 1:
+            # Single query mode
+            query = " ".join(sys.argv[1:])
+            results = await search_engine.search(query, limit=config.search_results_limit)
+            
+            print(f"\n📋 Found {len(results)} results:")
+            for i, result in enumerate(results, 1):
+                print(search_engine.format_result(result, i))
+        else:
+            # Interactive mode
+            await search_engine.interactive_search()
+    finally:
+        await search_engine.aclose()
 
 
 if __name__ == "__main__":
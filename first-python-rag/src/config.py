@@ -0,0 +1,93 @@
+"""
+Typed, cached access to config.ini.
+The file is parsed once per process; values can be overridden with
+RAG_<FIELD> environment variables (e.g. RAG_BATCH_SIZE=50).
+"""
+
+import configparser
+import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Config:
+    """Settings from config.ini (see docs/CONFIG_GUIDE.md)."""
+    # [Paths]
+    project_root: Optional[str] = None
+    database_path: str = "./data/lancedb"
+    jina_model_path: str = r"C:\models\huggingface\JinaV3\jina-embeddings-v3"
+    cache_dir: str = "./data/cache"
+    
+    # [Ingestion]
+    batch_size: int = 20
+    max_workers: int = 4
+    write_batch_size: int = 1000
+    enrich_concurrency: int = 8
+    incremental: bool = True
+    mock_enrichment: bool = False
+    enrichment_model: str = "gpt-4o-mini"
+    
+    # [Search]
+    use_query_expansion: bool = True
+    search_results_limit: int = 5
+    query_expansion_model: str = "gpt-4o-mini"
+    
+    # [Logging]
+    ingestion_log: str = "ingestion.log"
+    error_log: str = "ingestion_errors.log"
+
+
+# Section each field lives in
+_SECTIONS = {
+    'project_root': 'Paths',
+    'database_path': 'Paths',
+    'jina_model_path': 'Paths',
+    'cache_dir': 'Paths',
+    'batch_size': 'Ingestion',
+    'max_workers': 'Ingestion',
+    'write_batch_size': 'Ingestion',
+    'enrich_concurrency': 'Ingestion',
+    'incremental': 'Ingestion',
+    'mock_enrichment': 'Ingestion',
+    'enrichment_model': 'Ingestion',
+    'use_query_expansion': 'Search',
+    'search_results_limit': 'Search',
+    'query_expansion_model': 'Search',
+    'ingestion_log': 'Logging',
+    'error_log': 'Logging',
+}
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str = "config.ini") -> Config:
+    """
+    Read config.ini once and return an immutable Config.
+    
+    Args:
+        path: Path to the INI file (relative to the working directory)
+    
+    Returns:
+        Config with environment overrides applied
+    """
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    
+    values = {}
+    for field in fields(Config):
+        raw = os.getenv(f"RAG_{field.name.upper()}")
+        if raw is None:
+            raw = parser.get(_SECTIONS[field.name], field.name, fallback=None)
+        if raw is None:
+            continue
+        
+        # Convert using the field's default type
+        if isinstance(field.default, bool):
+            values[field.name] = parser.BOOLEAN_STATES.get(raw.strip().lower(), field.default)
+        elif isinstance(field.default, int):
+            values[field.name] = int(raw)
+        else:
+            values[field.name] = raw
+    
+    return Config(**values)
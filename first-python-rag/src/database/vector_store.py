@@ -5,18 +5,75 @@ Handles complex structural data: packages, inheritance, overloading.
 
 import json
 import hashlib
-import torch
+import math
+import re
+import numpy as np
+import orjson
+import pyarrow as pa
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import lancedb
 from lancedb.pydantic import LanceModel, Vector
 from pydantic import Field
-from transformers import AutoModel
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields of the parser's class_context string ("Package: x, Class: y, ...")
+_PACKAGE_RE = re.compile(r'Package: ([^,]*)')
+_CLASS_RE = re.compile(r'Class: ([^,]*)')
+_INHERITED_RE = re.compile(r'Inherited Methods: \[([^\]]*)\]')
+
+
+@lru_cache(maxsize=1024)
+def _parse_class_context(class_context: str) -> Dict[str, Any]:
+    """
+    Parse a class_context string (chunks without the parser's class_info).
+    Cached because every method of a class carries the same string.
+    """
+    # One regex scan per field instead of repeated split/index calls
+    match = _PACKAGE_RE.search(class_context)
+    package = match.group(1).strip() if match else "Unknown"
+    
+    match = _CLASS_RE.search(class_context)
+    class_name = match.group(1).strip() if match else "Unknown"
+    
+    match = _INHERITED_RE.search(class_context)
+    inherited_methods = [m.strip() for m in match.group(1).split(',') if m.strip()] if match else []
+    
+    return {'package': package, 'class_name': class_name, 'inherited_methods': inherited_methods}
+
+
+@lru_cache(maxsize=None)
+def _load_model(model_path: str, device: str, dtype):
+    """
+    Load the encoder once per (path, device, dtype) in this process.
+    Every VectorStore built afterwards (scripts, tests, several databases)
+    shares the weights instead of reading them from disk again.
+    """
+    from transformers import AutoModel
+    
+    logger.info(f"Loading Jina V3 model from {model_path}")
+    model = AutoModel.from_pretrained(
+        model_path,
+        trust_remote_code=True  # Required for Jina V3
+    )
+    model.to(device, dtype=dtype)
+    model.eval()  # Set to inference mode
+    return model
+
+
+# The shared model's fast tokenizer is not re-entrant ("Already borrowed") and
+# concurrent forward passes only contend for the GPU, so encode calls from
+# different threads take turns
+_encode_lock = threading.Lock()
+
 
 class CodeChunkSchema(LanceModel):
     """
@@ -37,6 +94,17 @@ class CodeChunkSchema(LanceModel):
     
     # Serialized JSON metadata
     metadata: str = Field(..., description="JSON with package, signature, dependencies, inheritance, file_path")
+    
+    # Filterable copies of the most-queried metadata fields
+    package: str = Field(..., description="Java package")
+    class_name: str = Field(..., description="Declaring class")
+    method_name: str = Field(..., description="Method name (<Constructor> for constructors)")
+    file_path: str = Field(..., description="Source file path")
+
+
+# Arrow equivalent of CodeChunkSchema, used to write RecordBatches directly
+_ARROW_SCHEMA = CodeChunkSchema.to_arrow_schema()
+_VECTOR_DIM = _ARROW_SCHEMA.field('vector').type.list_size
 
 
 class VectorStore:
@@ -49,7 +117,18 @@ class VectorStore:
         db_path: str = "./data/lancedb",
         model_path: str = r"C:\models\huggingface\JinaV3\jina-embeddings-v3",
         table_name: str = "code_chunks",
-        use_gpu: bool = True
+        use_gpu: bool = True,
+        embed_batch_size: int = 128,
+        embed_max_length: Optional[int] = None,
+        half_precision: bool = True,
+        compile_model: bool = False,
+        query_cache_size: int = 4096,
+        result_cache_size: int = 2000,
+        result_cache_ttl: float = 600.0,
+        hash_algo: str = "blake2b",
+        auto_index_threshold: int = 10_000,
+        index_type: str = "IVF_PQ",
+        refine_factor: Optional[int] = 5
     ):
         """
         Initialize vector store with Jina V3 model.
@@ -59,32 +138,133 @@ class VectorStore:
             model_path: Path to local Jina V3 model
             table_name: Name of the table
             use_gpu: Whether to use GPU if available
+            embed_batch_size: Texts per model forward pass when embedding
+            embed_max_length: Token cap per text, bounding the padded batch width
+                (None = the model's default of 8192)
+            half_precision: Run the encoder in BF16/FP16 on GPU (ignored on CPU)
+            compile_model: torch.compile the encoder on GPU (slow start, faster encode)
+            query_cache_size: Query embeddings kept in memory (0 disables the cache)
+            result_cache_size: Search result lists kept in memory (0 disables the cache)
+            result_cache_ttl: Seconds a cached result list stays valid (covers writes
+                from other processes; this instance's writes clear the cache)
+            hash_algo: Row ID hash, "blake2b" or "sha256" (IDs from older databases)
+            auto_index_threshold: Build an ANN index once the table reaches this many rows (0 disables)
+            index_type: Index built automatically ("IVF_PQ", or "IVF_SQ"/"IVF_HNSW_SQ" for int8 codes)
+            refine_factor: Re-rank refine_factor * limit indexed candidates with the FP32 vectors
         """
         self.db_path = Path(db_path)
         self.table_name = table_name
+        self.embed_batch_size = embed_batch_size
+        self.embed_max_length = embed_max_length
+        
+        # Both give 64-char hex IDs; BLAKE2b is faster on short inputs
+        if hash_algo not in ("blake2b", "sha256"):
+            raise ValueError(f"Unsupported hash_algo: {hash_algo}")
+        self.hash_algo = hash_algo
+        
+        # LRU of (task, query) -> embedding; search() runs in worker threads
+        self._query_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._query_cache_size = query_cache_size
+        self._query_cache_lock = threading.Lock()
+        
+        # LRU of (task, query, limit, where) -> (expiry, results), cleared on writes
+        self._result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._result_cache_size = result_cache_size
+        self._result_cache_ttl = result_cache_ttl
+        self._result_cache_lock = threading.Lock()
         
         # Ensure db directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Load Jina V3 model
-        logger.info(f"Loading Jina V3 model from {model_path}")
+        # torch/transformers take seconds to import, so only processes that
+        # actually build a store pay for them (not parse workers importing main_ingest)
+        import torch
+        
         self.device = 'cuda' if use_gpu and torch.cuda.is_available() else 'cpu'
         
-        self.model = AutoModel.from_pretrained(
-            model_path,
-            trust_remote_code=True  # Required for Jina V3
-        )
-        self.model.to(self.device)
-        self.model.eval()  # Set to inference mode
+        # Half precision halves memory traffic on GPU; CPU stays FP32
+        self.dtype = torch.float32
+        if half_precision and self.device == 'cuda':
+            self.dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        
+        # Load Jina V3 model (shared with other stores in this process)
+        self.model = _load_model(str(model_path), self.device, self.dtype)
+        logger.info(f"Model loaded on device: {self.device} ({self.dtype})")
         
-        logger.info(f"Model loaded on device: {self.device}")
+        # A shared model may already have been compiled by an earlier store
+        target = self._compile_target()
+        self._compiled = getattr(target, '_compiled_call_impl', None) is not None
+        if compile_model and self.device == 'cuda' and not self._compiled:
+            self._compile_model()
         
         # Connect to LanceDB
         self.db = lancedb.connect(str(self.db_path))
         logger.info(f"Connected to LanceDB at {self.db_path}")
         
-        # Table will be created on first add
-        self.table = None
+        # Open the table once (creating it empty if missing) and reuse the
+        # handle for every write; the lock keeps this process's writers serial
+        try:
+            self.table = self.db.open_table(self.table_name)
+        except ValueError:
+            self.table = self.db.create_table(self.table_name, schema=_ARROW_SCHEMA)
+        self._write_lock = threading.Lock()
+        
+        # Tables created before the structured columns existed keep the old schema
+        self._structured = 'file_path' in self.table.schema.names
+        if not self._structured:
+            logger.warning(
+                f"Table {self.table_name} predates the package/class_name/method_name/file_path "
+                f"columns; re-ingest into a fresh database to enable column filters"
+            )
+        
+        # Whether the vector column is indexed (None until checked)
+        self.auto_index_threshold = auto_index_threshold
+        self.index_type = index_type
+        self.refine_factor = refine_factor
+        self._has_index = None
+    
+    def _compile_target(self):
+        """
+        The submodule worth compiling, or None.
+        
+        Module.compile() only wraps __call__, and Jina's encode() reaches the
+        transformer through roberta.forward() directly, so compiling the top
+        module (or roberta itself) is never hit. The encoder stack inside
+        roberta is invoked as a module call, so that is what gets compiled.
+        """
+        roberta = getattr(self.model, 'roberta', None)
+        return getattr(roberta, 'encoder', None)
+    
+    def _compile_model(self):
+        """
+        Compile the encoder stack in place and warm it up.
+        Falls back to eager mode if compilation fails (Jina's remote code
+        is not guaranteed to trace cleanly).
+        """
+        target = self._compile_target()
+        if target is None:
+            logger.warning("Model has no roberta.encoder submodule; skipping torch.compile")
+            return
+        
+        try:
+            # Default mode: max-autotune re-tunes on every recompile, which
+            # dynamic shapes can trigger mid-run
+            target.compile(dynamic=True)
+            self._compiled = True
+            self.embed_texts(["warmup"] * 8)
+            logger.info("Encoder compiled with torch.compile")
+        except Exception as e:
+            logger.warning(f"torch.compile failed, using eager model: {e}")
+            self._disable_compile()
+    
+    def _disable_compile(self):
+        """Drop the compiled encoder so later calls run eagerly."""
+        import torch
+        torch._dynamo.reset()
+        target = self._compile_target()
+        if target is not None and hasattr(target, '_compiled_call_impl'):
+            target._compiled_call_impl = None
+        self._compiled = False
     
     def generate_id(self, package: str, class_name: str, signature: str) -> str:
         """
@@ -97,16 +277,17 @@ class VectorStore:
             signature: Full method signature
             
         Returns:
-            64-character hex string (SHA256 hash)
+            64-character hex string (BLAKE2b-256 or SHA256 hash)
         """
         # Combine all identifying information
-        unique_string = f"{package}::{class_name}::{signature}"
+        unique_string = f"{package}::{class_name}::{signature}".encode('utf-8', 'surrogatepass')
         
-        # Generate hash
-        hash_object = hashlib.sha256(unique_string.encode('utf-8'))
-        return hash_object.hexdigest()
+        # Generate hash (IDs are deterministic keys, not security tokens)
+        if self.hash_algo == "sha256":
+            return hashlib.sha256(unique_string).hexdigest()
+        return hashlib.blake2b(unique_string, digest_size=32).hexdigest()
     
-    def embed_texts(self, texts: List[str], task: str = "retrieval.passage") -> List[List[float]]:
+    def embed_texts(self, texts: List[str], task: str = "retrieval.passage") -> np.ndarray:
         """
         Generate embeddings using Jina V3 with task-specific API.
         
@@ -115,24 +296,69 @@ class VectorStore:
             task: Task type for Jina V3 (default: "retrieval.passage")
             
         Returns:
-            List of embedding vectors
+            (len(texts), 1024) float32 array of embedding vectors
         """
+        import torch  # already loaded by __init__; binds the name locally
+        
         logger.info(f"Embedding {len(texts)} texts with task={task}")
         
-        with torch.no_grad():
+        # Feed texts shortest-first so each forward pass pads to similar lengths
+        # (Jina's encode() tokenizes and pads per batch, so no pre-tokenizing here)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        
+        encode_kwargs = {}
+        if self.embed_max_length:
+            encode_kwargs['max_length'] = self.embed_max_length  # passed to the tokenizer
+        if self.device == 'cuda':
+            # Keep batch outputs on the GPU: no per-batch .cpu() sync, so the CPU
+            # tokenizes the next batch while the GPU is still computing. One
+            # device->host copy happens below.
+            encode_kwargs['convert_to_tensor'] = True
+        
+        # inference_mode skips autograd bookkeeping entirely (cheaper than no_grad)
+        with _encode_lock, torch.inference_mode():
             # Jina V3 specific API with task parameter
-            embeddings = self.model.encode(
-                texts,
-                task=task,
-                # Move to same device as model
-                device=self.device
-            )
-        
-        # Convert to list of lists
+            try:
+                embeddings = self.model.encode(
+                    [texts[i] for i in order],
+                    task=task,
+                    batch_size=self.embed_batch_size,
+                    # Move to same device as model
+                    device=self.device,
+                    **encode_kwargs
+                )
+            except Exception as e:
+                # A recompile can fail on a new input shape mid-run; redo the
+                # batch eagerly rather than lose it
+                if not self._compiled:
+                    raise
+                logger.warning(f"Compiled encoder failed, falling back to eager model: {e}")
+                self._disable_compile()
+                embeddings = self.model.encode(
+                    [texts[i] for i in order],
+                    task=task,
+                    batch_size=self.embed_batch_size,
+                    device=self.device,
+                    **encode_kwargs
+                )
+        
+        # FP32 numpy for storage, whatever the model dtype. This is the only
+        # device->host sync per call; copy in the model dtype (half the bytes
+        # under BF16/FP16) and widen on the host.
         if isinstance(embeddings, torch.Tensor):
-            embeddings = embeddings.cpu().numpy()
+            embeddings = embeddings.cpu().float().numpy()
+        
+        # Unit-normalize so search can rank by plain inner product
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
         
-        return embeddings.tolist()
+        # Scatter back to the caller's order
+        restored = np.empty_like(embeddings)
+        restored[order] = embeddings
+        
+        # Stays a contiguous array: no per-float Python objects, and Arrow/LanceDB
+        # can take the buffer as-is
+        return restored
     
     def build_search_text(self, chunk: Dict[str, Any]) -> str:
         """
@@ -177,136 +403,169 @@ class VectorStore:
         Returns:
             Metadata dictionary
         """
-        # Extract package from class_context
-        package = "Unknown"
-        class_name = "Unknown"
-        inherited_methods = []
-        
-        class_context = chunk.get('class_context', '')
-        
-        # Parse package
-        if 'Package: ' in class_context:
-            package_part = class_context.split(',')[0]
-            package = package_part.replace('Package: ', '').strip()
-        
-        # Parse class name
-        if 'Class: ' in class_context:
-            class_parts = class_context.split('Class: ')
-            if len(class_parts) > 1:
-                class_name = class_parts[1].split(',')[0].strip()
-        
-        # Parse inherited methods
-        if 'Inherited Methods: [' in class_context:
-            start = class_context.index('Inherited Methods: [') + len('Inherited Methods: [')
-            end = class_context.index(']', start)
-            inherited_str = class_context[start:end]
-            inherited_methods = [m.strip() for m in inherited_str.split(',') if m.strip()]
+        # Structured class info from the parser; older chunks only have the string
+        class_info = chunk.get('class_info') or _parse_class_context(chunk.get('class_context', ''))
         
         metadata = {
-            'package': package,
-            'class_name': class_name,
+            'package': class_info['package'],
+            'class_name': class_info['class_name'],
             'signature': chunk.get('method_signature', ''),
             'method_name': chunk.get('method_name', ''),
             'dependencies': chunk.get('dependency_types', []),
-            'inherited_methods': inherited_methods,
-            'file_path': file_path or 'unknown'
+            'inherited_methods': class_info['inherited_methods'],
+            'file_path': file_path or chunk.get('file_path') or 'unknown'
         }
         
         return metadata
     
-    def add_batch(self, enriched_chunks: List[Dict[str, Any]], file_path: Optional[str] = None):
+    def add_batch(
+        self,
+        enriched_chunks: List[Dict[str, Any]],
+        file_path: Optional[str] = None,
+        embeddings: Optional[np.ndarray] = None
+    ):
         """
         Add a batch of enriched chunks to the vector store.
+        All search texts are embedded in one batched call unless
+        precomputed embeddings are supplied.
         
         Args:
             enriched_chunks: List of enriched code chunks
             file_path: Source file path
+            embeddings: Optional precomputed vectors, one per chunk (skips embedding)
         """
         logger.info(f"Adding batch of {len(enriched_chunks)} chunks")
         
-        records = []
+        columns = self._build_records(enriched_chunks, file_path)
+        self._write_records(columns, embeddings)
+        self._maybe_build_index()
+    
+    def add_many(self, chunks_per_file: Dict[str, List[Dict[str, Any]]]):
+        """
+        Add chunks from many files with a single embedding pass.
+        Avoids one small forward pass per file when callers group by file.
         
-        for chunk in enriched_chunks:
-            # Extract metadata
-            metadata = self.extract_metadata(chunk, file_path)
-            
-            # Generate deterministic ID
-            chunk_id = self.generate_id(
-                metadata['package'],
-                metadata['class_name'],
-                metadata['signature']
-            )
-            
-            # Build search text
-            search_text = self.build_search_text(chunk)
-            
-            # Serialize metadata to JSON
-            metadata_json = json.dumps(metadata)
+        Args:
+            chunks_per_file: Mapping of source file path -> enriched chunks
+        """
+        columns = {name: [] for name in _ARROW_SCHEMA.names if name != 'vector'}
+        for file_path, chunks in chunks_per_file.items():
+            for name, values in self._build_records(chunks, file_path).items():
+                columns[name].extend(values)
+        
+        logger.info(f"Adding {len(columns['id'])} chunks from {len(chunks_per_file)} files")
+        self._write_records(columns)
+        self._maybe_build_index()
+    
+    def _build_records(
+        self,
+        enriched_chunks: List[Dict[str, Any]],
+        file_path: Optional[str] = None
+    ) -> Dict[str, List[str]]:
+        """Build table columns (without vectors) for enriched chunks."""
+        metadatas = [self.extract_metadata(chunk, file_path) for chunk in enriched_chunks]
+        
+        # Deterministic IDs, search texts and metadata JSON, one column at a time
+        return {
+            'id': [
+                self.generate_id(m['package'], m['class_name'], m['signature'])
+                for m in metadatas
+            ],
+            'search_text': [self.build_search_text(chunk) for chunk in enriched_chunks],
+            'code': [chunk.get('method_body', '') for chunk in enriched_chunks],
+            'metadata': [orjson.dumps(m).decode('utf-8') for m in metadatas],
+            'package': [m['package'] for m in metadatas],
+            'class_name': [m['class_name'] for m in metadatas],
+            'method_name': [m['method_name'] for m in metadatas],
+            'file_path': [m['file_path'] for m in metadatas],
+        }
+    
+    def _write_records(
+        self,
+        columns: Dict[str, List[str]],
+        embeddings: Optional[np.ndarray] = None
+    ):
+        """Embed rows (unless vectors are supplied) and append them to the table."""
+        if not columns['id']:
+            return
+        
+        # Generate embeddings for all search texts in one batched call
+        if embeddings is None:
+            embeddings = self.embed_texts(columns['search_text'])
+        elif len(embeddings) != len(columns['id']):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(columns['id'])} chunks")
+        
+        # Arrow batch with a contiguous float32 vector column; LanceDB copies the
+        # buffers in bulk instead of validating one dict per row
+        vectors = np.asarray(embeddings, dtype=np.float32).ravel()
+        arrays = {
+            name: pa.array(values, type=pa.string()) for name, values in columns.items()
+        }
+        arrays['vector'] = pa.FixedSizeListArray.from_arrays(pa.array(vectors), _VECTOR_DIM)
+        
+        # Write exactly the table's columns (older tables lack the structured ones)
+        schema = self.table.schema
+        records = pa.RecordBatch.from_arrays(
+            [arrays[name] for name in schema.names],
+            schema=schema
+        )
+        
+        with self._write_lock:
+            self.table.add(records)
+        self._clear_result_cache()
+        logger.info(f"Added {records.num_rows} records to {self.table_name}")
+    
+    def delete_files(self, file_paths: List[str], group_size: int = 100):
+        """
+        Delete all chunks that came from the given source files.
+        Used by incremental ingestion before re-adding modified files.
+        
+        Args:
+            file_paths: Source file paths as stored in chunk metadata
+            group_size: Number of files combined into one delete predicate
+        """
+        if not file_paths:
+            return
+        
+        logger.info(f"Deleting chunks for {len(file_paths)} files")
+        
+        for i in range(0, len(file_paths), group_size):
+            group = file_paths[i:i + group_size]
+            if self._structured:
+                # Plain column comparison - no JSON pattern matching needed
+                quoted = ", ".join("'" + path.replace("'", "''") + "'" for path in group)
+                with self._write_lock:
+                    self.table.delete(f"file_path IN ({quoted})")
+                continue
             
-            records.append({
-                'id': chunk_id,
-                'search_text': search_text,
-                'code': chunk.get('method_body', ''),
-                'metadata': metadata_json
-            })
-        
-        # Generate embeddings for all search texts
-        search_texts = [r['search_text'] for r in records]
-        embeddings = self.embed_texts(search_texts)
-        
-        # Add vectors to records
-        for record, embedding in zip(records, embeddings):
-            record['vector'] = embedding
-        
-        # Create or append to table
-        if self.table is None:
-            # Check if table exists
-            try:
-                self.table = self.db.open_table(self.table_name)
-                logger.info(f"Opened existing table: {self.table_name}")
-            except:
-                # Create new table with retry logic for Windows file locking
-                logger.info(f"Creating new table: {self.table_name}")
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        self.table = self.db.create_table(
-                            self.table_name,
-                            data=records,
-                            schema=CodeChunkSchema
-                        )
-                        logger.info(f"Added {len(records)} records to new table")
-                        return
-                    except Exception as e:
-                        if attempt < max_retries - 1 and "being used by another process" in str(e):
-                            import time
-                            wait_time = (attempt + 1) * 2  # 2s, 4s, 6s
-                            logger.warning(f"File lock error, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
-                            time.sleep(wait_time)
-                        else:
-                            raise
-        
-        # Add to existing table with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                self.table.add(records)
-                logger.info(f"Added {len(records)} records to existing table")
-                return
-            except Exception as e:
-                if attempt < max_retries - 1 and "being used by another process" in str(e):
-                    import time
-                    wait_time = (attempt + 1) * 2  # 2s, 4s, 6s
-                    logger.warning(f"File lock error, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                else:
-                    raise
+            # Match the JSON-encoded path exactly as it appears in the metadata blob,
+            # both as written by orjson and by older json.dumps-based versions
+            # (escape LIKE wildcards/backslashes and SQL quotes)
+            predicates = []
+            for file_path in group:
+                encodings = (
+                    '"file_path":' + orjson.dumps(file_path).decode('utf-8'),
+                    '"file_path": ' + json.dumps(file_path),
+                )
+                for encoded in encodings:
+                    needle = (
+                        encoded
+                        .replace('\\', '\\\\')
+                        .replace('%', '\\%')
+                        .replace('_', '\\_')
+                        .replace("'", "''")
+                    )
+                    predicates.append(f"metadata LIKE '%{needle}%'")
+            with self._write_lock:
+                self.table.delete(" OR ".join(predicates))
+        self._clear_result_cache()
     
     def search(
         self,
         query: str,
         limit: int = 5,
-        task: str = "retrieval.query"
+        task: str = "retrieval.query",
+        where: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar code chunks.
@@ -315,36 +574,262 @@ class VectorStore:
             query: Search query
             limit: Number of results
             task: Task type for query embedding
+            where: Optional SQL filter on the structured columns,
+                e.g. "package = 'com.example'" (applied before the vector search)
             
         Returns:
             List of search results with metadata
         """
-        if self.table is None:
-            logger.warning("No table exists yet")
-            return []
+        # Repeat searches are answered from the result cache
+        key = (task, " ".join(query.split()), limit, where)
+        cached = self._cached_results(key)
+        if cached is not None:
+            return cached
+        
+        # Embed query (repeat queries skip the model)
+        query_embedding = self._embed_query(query, task)
+        results = self._query(query_embedding, limit, where).to_list()
         
-        # Embed query
-        query_embedding = self.embed_texts([query], task=task)[0]
+        self._finish_results(key, results)
+        return results
+    
+    def batch_search(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        task: str = "retrieval.query",
+        where: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries at once.
+        Uncached queries are embedded in one forward pass and sent to
+        LanceDB as a single multi-vector query.
         
-        # Search
-        results = self.table.search(query_embedding).limit(limit).to_list()
+        Args:
+            queries: Search queries
+            limit: Number of results per query
+            task: Task type for query embedding
+            where: Optional SQL filter on the structured columns (as in search)
+            
+        Returns:
+            One result list per query, in query order
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+        
+        # Cache key -> positions of the queries that share it
+        pending: Dict[tuple, List[int]] = {}
+        for i, query in enumerate(queries):
+            key = (task, " ".join(query.split()), limit, where)
+            cached = self._cached_results(key) if key not in pending else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+        
+        if not pending:
+            return results
+        
+        keys = list(pending)
+        embeddings = self._embed_queries([queries[pending[key][0]] for key in keys], task)
+        
+        # Rows come back tagged with the position of their query vector
+        grouped: List[List[Dict[str, Any]]] = [[] for _ in keys]
+        for row in self._query(list(embeddings), limit, where).to_list():
+            grouped[row.pop('query_index', 0)].append(row)
+        
+        for key, hits in zip(keys, grouped):
+            self._finish_results(key, hits)
+            first, *rest = pending[key]
+            results[first] = hits
+            for i in rest:
+                results[i] = [dict(result) for result in hits]
         
+        return results
+    
+    def _query(self, query_vectors, limit: int, where: Optional[str]):
+        """Build the LanceDB query for one vector or a list of vectors."""
+        # Search (quantized index candidates are re-ranked with exact FP32 distances)
+        # Vectors are unit-length, so dot product ranks like cosine (_distance = 1 - cos)
+        query_builder = self.table.search(query_vectors).distance_type("dot").limit(limit)
+        if self.refine_factor and self.has_vector_index():
+            query_builder = query_builder.refine_factor(self.refine_factor)
+        if where:
+            query_builder = query_builder.where(where, prefilter=True)
+        return query_builder
+    
+    def _cached_results(self, key: tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return copies of unexpired cached results for a search key, or None."""
+        if self._result_cache_size <= 0:
+            return None
+        with self._result_cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._result_cache.move_to_end(key)
+                # Shallow copies: callers annotate result dicts
+                return [dict(result) for result in entry[1]]
+        return None
+    
+    def _finish_results(self, key: tuple, results: List[Dict[str, Any]]):
+        """Parse metadata JSON in place and cache the results under key."""
         # Parse metadata JSON
         for result in results:
             if 'metadata' in result:
-                result['metadata_parsed'] = json.loads(result['metadata'])
+                result['metadata_parsed'] = orjson.loads(result['metadata'])
+        
+        if self._result_cache_size > 0:
+            with self._result_cache_lock:
+                self._result_cache[key] = (
+                    time.monotonic() + self._result_cache_ttl,
+                    [dict(result) for result in results]
+                )
+                self._result_cache.move_to_end(key)
+                if len(self._result_cache) > self._result_cache_size:
+                    self._result_cache.popitem(last=False)
+    
+    def _clear_result_cache(self):
+        """Drop cached search results after the table changed."""
+        with self._result_cache_lock:
+            self._result_cache.clear()
+    
+    def _embed_query(self, query: str, task: str) -> np.ndarray:
+        """
+        Embed a single query, serving repeats from the LRU cache.
         
-        return results
+        Args:
+            query: Search query
+            task: Task type for query embedding
+            
+        Returns:
+            Embedding vector
+        """
+        return self._embed_queries([query], task)[0]
+    
+    def _embed_queries(self, queries: List[str], task: str) -> np.ndarray:
+        """
+        Embed queries, serving repeats from the LRU cache and the rest
+        in one batched forward pass.
+        
+        Args:
+            queries: Search queries
+            task: Task type for query embedding
+            
+        Returns:
+            One embedding vector per query
+        """
+        # Whitespace-insensitive key; case is kept since identifiers are case-sensitive
+        keys = [(task, " ".join(query.split())) for query in queries]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(queries)
+        with self._query_cache_lock:
+            for i, key in enumerate(keys):
+                if key in self._query_cache:
+                    self._query_cache.move_to_end(key)
+                    embeddings[i] = self._query_cache[key]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self.embed_texts([queries[i] for i in missing], task=task)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+            
+            if self._query_cache_size > 0:
+                with self._query_cache_lock:
+                    for i in missing:
+                        self._query_cache[keys[i]] = embeddings[i]
+                    while len(self._query_cache) > self._query_cache_size:
+                        self._query_cache.popitem(last=False)
+        
+        return np.stack(embeddings)
+    
+    def has_vector_index(self) -> bool:
+        """Whether an ANN index exists on the vector column."""
+        if self._has_index is None:
+            self._has_index = any(
+                'vector' in index.columns for index in self.table.list_indices()
+            )
+        return self._has_index
+    
+    def build_index(
+        self,
+        num_partitions: Optional[int] = None,
+        num_sub_vectors: int = 64,
+        metric: str = "dot",
+        index_type: Optional[str] = None
+    ):
+        """
+        Build an ANN index on the vector column so search stops scanning every row.
+        
+        Args:
+            num_partitions: IVF partitions (default: sqrt of the row count)
+            num_sub_vectors: PQ sub-vectors; 64 gives 16 dims each for 1024-dim vectors
+            metric: Distance metric; "dot" matches search() on unit-normalized vectors
+            index_type: "IVF_PQ", or "IVF_SQ"/"IVF_HNSW_SQ" for int8 scalar quantization
+                (default: the store's index_type)
+        """
+        index_type = index_type or self.index_type
+        count = self.table.count_rows()
+        num_partitions = num_partitions or max(1, int(math.sqrt(count)))
+        
+        options = {}
+        if index_type.endswith("PQ"):
+            options['num_sub_vectors'] = num_sub_vectors
+        
+        logger.info(f"Building {index_type} index over {count} rows ({num_partitions} partitions)")
+        with self._write_lock:
+            self.table.create_index(
+                metric=metric,
+                num_partitions=num_partitions,
+                vector_column_name='vector',
+                index_type=index_type,
+                **options
+            )
+        self._has_index = True
+        self._clear_result_cache()
+    
+    def _maybe_build_index(self):
+        """Build the ANN index once the table grows past auto_index_threshold."""
+        if not self.auto_index_threshold or self.has_vector_index():
+            return
+        
+        if self.table.count_rows() >= self.auto_index_threshold:
+            self.build_index()
+    
+    def _table_size_bytes(self) -> int:
+        """Total on-disk size of the table directory."""
+        table_dir = self.db_path / f"{self.table_name}.lance"
+        return sum(f.stat().st_size for f in table_dir.rglob('*') if f.is_file())
+    
+    def optimize(self, cleanup_older_than: timedelta = timedelta(minutes=10)) -> Dict[str, Any]:
+        """
+        Compact small fragments left by many commits and prune old versions.
+        Run after bulk loads so queries don't scan hundreds of tiny files.
+        
+        Args:
+            cleanup_older_than: Keep versions newer than this, so readers still
+                on them (and rollback) keep working; timedelta(0) prunes
+                everything but the latest and is only safe once writes are done
+        
+        Returns:
+            Dictionary with bytes_before and bytes_after
+        """
+        bytes_before = self._table_size_bytes()
+        # optimize() = compact_files() + cleanup of old versions + index update
+        with self._write_lock:
+            self.table.optimize(cleanup_older_than=cleanup_older_than)
+        bytes_after = self._table_size_bytes()
+        
+        logger.info(
+            f"Optimized table {self.table_name}: "
+            f"{bytes_before / 1024**2:.1f} MB -> {bytes_after / 1024**2:.1f} MB"
+        )
+        return {'bytes_before': bytes_before, 'bytes_after': bytes_after}
     
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
-        if self.table is None:
-            return {'count': 0, 'table_exists': False}
-        
         count = self.table.count_rows()
         return {
             'count': count,
             'table_exists': True,
             'table_name': self.table_name,
-            'db_path': str(self.db_path)
+            'db_path': str(self.db_path),
+            'has_vector_index': self.has_vector_index()
         }
@@ -3,9 +3,11 @@ Code Enricher using LLM to generate summaries and keywords for code chunks.
 """
 
 import asyncio
-import json
+import orjson
 import os
-from typing import List, Dict, Optional, Any
+import time
+from typing import List, Dict, Optional, Any, Tuple
+import httpx
 from openai import AsyncOpenAI
 import logging
 from dotenv import load_dotenv
@@ -17,6 +19,23 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Methods larger than this (~1250 lines) skip the LLM - catches only extreme cases
+MAX_METHOD_BODY = 50000
+
+# Bump whenever the prompts below change so cached enrichments are redone
+PROMPT_VERSION = 1
+
+# Shared by the single- and multi-chunk prompts
+_TASK_INSTRUCTIONS = """1. Summary: Write a 1-sentence summary of the BUSINESS LOGIC. Do not explain syntax.
+   - Good: "Calculates the tax rate based on the transaction type."
+   - Bad: "Takes an integer and returns a float."
+   - For constructors: Focus on initialization purpose, not implementation details.
+2. Keywords: List 3-5 synonyms or technical terms a user might search for to find this code.
+   - Use domain-specific terms
+   - Include operation verbs (e.g., for 'kill' → ['terminate', 'end', 'stop'])
+   - Include class/type names from context and dependencies
+"""
+
 
 class CodeEnricher:
     """
@@ -27,8 +46,10 @@ class CodeEnricher:
         self,
         api_key: Optional[str] = None,
         model: str = "gpt-4o-mini",
-        max_concurrent: int = 5,
-        mock_mode: bool = False
+        max_concurrent: int = 16,
+        mock_mode: bool = False,
+        chunks_per_request: int = 4,
+        requests_per_minute: Optional[int] = None
     ):
         """
         Initialize the code enricher.
@@ -38,24 +59,53 @@ class CodeEnricher:
             model: Model to use for enrichment
             max_concurrent: Maximum concurrent API calls
             mock_mode: If True, uses mock responses instead of API calls
+            chunks_per_request: Chunks packed into one API request (1 = one per call)
+            requests_per_minute: Space request starts to stay under the account's
+                RPM limit (None = no pacing; only max_concurrent applies)
         """
         self.model = model
         self.max_concurrent = max_concurrent
+        self.chunks_per_request = max(1, chunks_per_request)
         self.mock_mode = mock_mode
         
+        # Shared by every enrich_batch call, so callers running several
+        # batches at once still stay within max_concurrent requests
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        
+        # Start time reserved for the next API request when pacing is enabled
+        self._min_interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_request_at = 0.0
+        self._rate_lock = asyncio.Lock()
+        
         # Initialize OpenAI client if not in mock mode
+        self._http = None
         if not mock_mode:
             api_key = api_key or os.getenv("OPENAI_API_KEY")
             if not api_key:
                 logger.warning("No API key provided. Running in mock mode.")
                 self.mock_mode = True
             else:
-                self.client = AsyncOpenAI(api_key=api_key)
+                # One pooled keep-alive client for every enrich_batch call, so
+                # concurrent requests reuse warm connections instead of new handshakes
+                pool_size = max(64, max_concurrent * 2)
+                self._http = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                    timeout=httpx.Timeout(60.0, pool=None)  # wait for a free connection
+                )
+                # 429s and transient errors are retried with exponential backoff
+                # (honoring Retry-After) by the client itself
+                self.client = AsyncOpenAI(api_key=api_key, http_client=self._http, max_retries=3)
                 logger.info(f"Initialized OpenAI client with model: {model}")
         
         if self.mock_mode:
             logger.info("Running in MOCK MODE - no actual API calls will be made")
     
+    async def aclose(self):
+        """Close the pooled HTTP client used for API calls."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     async def enrich_batch(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Enrich a batch of code chunks with summaries and keywords.
@@ -69,14 +119,28 @@ class CodeEnricher:
         """
         logger.info(f"Enriching {len(chunks)} code chunks...")
         
-        # Create semaphore to limit concurrent requests
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        
-        # Enrich all chunks concurrently
-        tasks = [
-            self._enrich_single_chunk(chunk, semaphore, idx)
-            for idx, chunk in enumerate(chunks)
-        ]
+        # Enrich all chunks concurrently; real API calls pack several chunks
+        # into each request so the instructions are paid for once per group
+        if self.mock_mode or self.chunks_per_request == 1:
+            tasks = [
+                self._enrich_single_chunk(chunk, self._semaphore, idx)
+                for idx, chunk in enumerate(chunks)
+            ]
+        else:
+            # Groups never span classes, so each request's system message
+            # (instructions + class context) is a prefix the API can cache
+            by_class: Dict[str, List[Dict[str, Any]]] = {}
+            for chunk in chunks:
+                by_class.setdefault(chunk.get('class_context', ''), []).append(chunk)
+            
+            size = self.chunks_per_request
+            tasks = []
+            idx = 0
+            for class_chunks in by_class.values():
+                for start in range(0, len(class_chunks), size):
+                    group = class_chunks[start:start + size]
+                    tasks.append(self._enrich_group(group, self._semaphore, idx))
+                    idx += len(group)
         
         enriched_chunks = await asyncio.gather(*tasks, return_exceptions=True)
         
@@ -87,6 +151,8 @@ class CodeEnricher:
             if isinstance(result, Exception):
                 logger.error(f"Enrichment failed: {result}")
                 failed += 1
+            elif isinstance(result, list):
+                successful.extend(result)
             else:
                 successful.append(result)
         
@@ -116,13 +182,101 @@ class CodeEnricher:
             else:
                 return await self._llm_enrich(chunk, idx)
     
+    async def _enrich_group(
+        self,
+        group: List[Dict[str, Any]],
+        semaphore: asyncio.Semaphore,
+        idx: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Enrich a group of chunks with one API request.
+        
+        Args:
+            group: Code chunks to enrich together
+            semaphore: Semaphore for concurrency control
+            idx: Index of the first chunk, for logging
+            
+        Returns:
+            Enriched chunks
+        """
+        async with semaphore:
+            # Oversized methods get the single-chunk fallback, never a shared request
+            packed = [c for c in group if len(c.get('method_body', '')) <= MAX_METHOD_BODY]
+            oversized = [c for c in group if len(c.get('method_body', '')) > MAX_METHOD_BODY]
+            
+            results = [await self._llm_enrich(chunk, idx) for chunk in oversized]
+            if len(packed) == 1:
+                results.append(await self._llm_enrich(packed[0], idx))
+            elif packed:
+                results.extend(await self._llm_enrich_many(packed, idx))
+            return results
+    
+    async def _llm_enrich_many(self, chunks: List[Dict[str, Any]], idx: int) -> List[Dict[str, Any]]:
+        """
+        Enrich several chunks with a single LLM API call.
+        Falls back to one request per chunk if the combined answer is unusable.
+        """
+        system_msg, user_msg = self._build_batch_prompt(chunks)
+        
+        try:
+            content = await self._complete(system_msg, user_msg, max_tokens=300 * len(chunks))
+            enrichments = self._parse_batch_response(content, len(chunks))
+        except Exception as e:
+            logger.warning(
+                f"Batched enrichment failed for chunks {idx}-{idx + len(chunks) - 1} ({e}), "
+                f"retrying one per request"
+            )
+            return [await self._llm_enrich(chunk, idx + i) for i, chunk in enumerate(chunks)]
+        
+        # Reattach results by position
+        for chunk, enrichment in zip(chunks, enrichments):
+            chunk['summary'] = enrichment.get('summary', 'Summary not available')
+            chunk['keywords'] = enrichment.get('keywords', [])
+        
+        logger.debug(f"Enriched chunks {idx}-{idx + len(chunks) - 1} in one request")
+        return chunks
+    
+    async def _complete(self, system_msg: str, user_msg: str, max_tokens: int) -> str:
+        """Send an enrichment prompt and return the raw JSON content."""
+        await self._wait_for_rate_limit()
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_msg
+                },
+                {
+                    "role": "user",
+                    "content": user_msg
+                }
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+    
+    async def _wait_for_rate_limit(self):
+        """Wait for this request's start slot when requests_per_minute is set."""
+        if not self._min_interval:
+            return
+        
+        # Reserve a slot under the lock, sleep outside it
+        async with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request_at)
+            self._next_request_at = start + self._min_interval
+        
+        if start > now:
+            await asyncio.sleep(start - now)
+    
     async def _llm_enrich(self, chunk: Dict[str, Any], idx: int) -> Dict[str, Any]:
         """
         Enrich using actual LLM API call.
         Adds safety check for oversized chunks.
         """
         # Safety: Check chunk size before processing
-        MAX_METHOD_BODY = 50000  # 50KB max (~1250 lines) - catches only extreme cases
         method_body = chunk.get('method_body', '')
         
         if len(method_body) > MAX_METHOD_BODY:
@@ -135,29 +289,13 @@ class CodeEnricher:
             return chunk
         
         # Construct prompt
-        prompt = self._build_prompt(chunk)
+        system_msg, user_msg = self._build_prompt(chunk)
         
         try:
             # Call OpenAI API
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a Java code analysis expert. Analyze code and provide concise summaries and search keywords in JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-                max_tokens=300
-            )
+            content = await self._complete(system_msg, user_msg, max_tokens=300)
             
             # Parse response
-            content = response.choices[0].message.content
             enrichment = self._parse_llm_response(content)
             
             # Add enrichment to chunk
@@ -167,7 +305,7 @@ class CodeEnricher:
             logger.debug(f"Enriched chunk {idx}: {chunk['method_name']}")
             return chunk
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parsing error for chunk {idx}: {e}")
             return self._add_fallback_enrichment(chunk)
             
@@ -207,16 +345,70 @@ class CodeEnricher:
         logger.debug(f"Mock enriched chunk {idx}: {method_name}")
         return chunk
     
-    def _build_prompt(self, chunk: Dict[str, Any]) -> str:
+    def _build_prompt(self, chunk: Dict[str, Any]) -> Tuple[str, str]:
         """
         Build the context-aware enrichment prompt for a code chunk.
         Leverages inheritance, dependencies, and structural information.
+        
+        Args:
+            chunk: Code chunk dictionary
+            
+        Returns:
+            (system message, user message). The system message holds the static
+            instructions and the class context, so every method of a class shares
+            the same prompt prefix; the user message holds only the method itself.
         """
-        method_name = chunk.get('method_name', 'unknown')
-        method_sig = chunk.get('method_signature', '')
-        method_body = chunk.get('method_body', '')
+        system_msg = f"""You are a senior Java Architect. I will provide a method of the class described below, and its dependencies.
+Your goal is to explain the *intent* of this code for a semantic search engine.
+
+--- TASK ---
+{_TASK_INSTRUCTIONS}
+--- OUTPUT FORMAT ---
+Return ONLY raw JSON (no markdown, no code blocks):
+{{
+  "summary": "Your 1-sentence business logic summary here",
+  "keywords": ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
+}}
+
+{self._format_class(chunk)}"""
+        return system_msg, self._format_method(chunk)
+    
+    def _build_batch_prompt(self, chunks: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Build one prompt covering several chunks so the instructions are sent once.
+        The model answers with one result per chunk, in order.
+        
+        Args:
+            chunks: Code chunks from the same class
+            
+        Returns:
+            (system message, user message), split as in _build_prompt
+        """
+        system_msg = f"""You are a senior Java Architect. I will provide several methods of the class described below, each with its dependencies.
+Your goal is to explain the *intent* of each method for a semantic search engine.
+
+--- TASK (for EACH chunk) ---
+{_TASK_INSTRUCTIONS}
+--- OUTPUT FORMAT ---
+Return ONLY raw JSON (no markdown, no code blocks) with exactly one result per chunk, in chunk order:
+{{
+  "results": [
+    {{"summary": "1-sentence business logic summary", "keywords": ["keyword1", "keyword2", "keyword3"]}}
+  ]
+}}
+
+{self._format_class(chunks[0])}"""
+        
+        user_msg = "\n".join(
+            f"=== CHUNK {i} ===\n{self._format_method(chunk)}"
+            for i, chunk in enumerate(chunks)
+        )
+        user_msg += f"\nReturn exactly {len(chunks)} results."
+        return system_msg, user_msg
+    
+    def _format_class(self, chunk: Dict[str, Any]) -> str:
+        """Format the CONTEXT section shared by every method of a class."""
         class_context = chunk.get('class_context', '')
-        dependencies = chunk.get('dependency_types', [])
         
         # Extract package name from class_context
         package_name = "Unknown"
@@ -225,6 +417,19 @@ class CodeEnricher:
             package_part = class_context.split(',')[0]
             package_name = package_part.replace('Package: ', '').strip()
         
+        return f"""--- CONTEXT ---
+1. Package: {package_name}
+   (Note: Use this to understand the module/component this code belongs to)
+2. Class Context: {class_context}
+   (Note: Includes fields and inherited methods if applicable)
+"""
+    
+    def _format_method(self, chunk: Dict[str, Any]) -> str:
+        """Format the method-specific METHOD and CODE sections for one chunk."""
+        method_sig = chunk.get('method_signature', '')
+        method_body = chunk.get('method_body', '')
+        dependencies = chunk.get('dependency_types', [])
+        
         # Format dependencies
         dependencies_str = ", ".join(dependencies) if dependencies else "None"
         
@@ -233,61 +438,23 @@ class CodeEnricher:
         if len(method_body) > max_body_length:
             method_body = method_body[:max_body_length] + "\n... (truncated)"
         
-        prompt = f"""System: You are a senior Java Architect. I will provide a method, its class context, and its dependencies.
-Your goal is to explain the *intent* of this code for a semantic search engine.
-
---- CONTEXT ---
-1. Package: {package_name}
-   (Note: Use this to understand the module/component this code belongs to)
-2. Class Context: {class_context}
-   (Note: Includes fields and inherited methods if applicable)
+        return f"""--- METHOD ---
 3. Method Signature: {method_sig}
 4. Dependencies: {dependencies_str}
    (Note: Custom types used as parameters - may need instantiation)
 
 --- CODE ---
 {method_body}
-
---- TASK ---
-1. Summary: Write a 1-sentence summary of the BUSINESS LOGIC. Do not explain syntax.
-   - Good: "Calculates the tax rate based on the transaction type."
-   - Bad: "Takes an integer and returns a float."
-   - For constructors: Focus on initialization purpose, not implementation details.
-2. Keywords: List 3-5 synonyms or technical terms a user might search for to find this code.
-   - Use domain-specific terms
-   - Include operation verbs (e.g., for 'kill' → ['terminate', 'end', 'stop'])
-   - Include class/type names from context and dependencies
-
---- OUTPUT FORMAT ---
-Return ONLY raw JSON (no markdown, no code blocks):
-{{
-  "summary": "Your 1-sentence business logic summary here",
-  "keywords": ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
-}}
 """
-        return prompt
     
     def _parse_llm_response(self, content: str) -> Dict[str, Any]:
         """
         Parse LLM JSON response with error handling.
         """
         try:
-            data = json.loads(content)
-            
-            # Validate structure
-            if 'summary' not in data:
-                raise ValueError("Missing 'summary' field")
-            if 'keywords' not in data:
-                raise ValueError("Missing 'keywords' field")
-            if not isinstance(data['keywords'], list):
-                raise ValueError("'keywords' must be a list")
+            return self._validate_enrichment(orjson.loads(content))
             
-            # Ensure keywords are strings
-            data['keywords'] = [str(k) for k in data['keywords'][:5]]
-            
-            return data
-            
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON from LLM: {content}")
             raise
             
@@ -295,6 +462,38 @@ Return ONLY raw JSON (no markdown, no code blocks):
             logger.error(f"Invalid response structure: {e}")
             raise
     
+    def _parse_batch_response(self, content: str, expected: int) -> List[Dict[str, Any]]:
+        """
+        Parse a multi-chunk LLM response: {"results": [{summary, keywords}, ...]}.
+        Raises ValueError unless there is exactly one valid result per chunk.
+        """
+        data = orjson.loads(content)
+        results = data.get('results') if isinstance(data, dict) else None
+        
+        if not isinstance(results, list) or len(results) != expected:
+            raise ValueError(f"Expected {expected} results, got {len(results) if isinstance(results, list) else 'none'}")
+        
+        return [self._validate_enrichment(item) for item in results]
+    
+    @staticmethod
+    def _validate_enrichment(data: Any) -> Dict[str, Any]:
+        """Check one {summary, keywords} object and normalize its keywords."""
+        if not isinstance(data, dict):
+            raise ValueError("Result must be a JSON object")
+        
+        # Validate structure
+        if 'summary' not in data:
+            raise ValueError("Missing 'summary' field")
+        if 'keywords' not in data:
+            raise ValueError("Missing 'keywords' field")
+        if not isinstance(data['keywords'], list):
+            raise ValueError("'keywords' must be a list")
+        
+        # Ensure keywords are strings
+        data['keywords'] = [str(k) for k in data['keywords'][:5]]
+        
+        return data
+    
     def _add_fallback_enrichment(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
         """
         Add fallback enrichment when LLM call fails.
@@ -303,6 +502,7 @@ Return ONLY raw JSON (no markdown, no code blocks):
         
         chunk['summary'] = f"Method {method_name} - enrichment unavailable"
         chunk['keywords'] = [method_name.lower(), 'java']
+        chunk['enrichment_fallback'] = True  # Lets callers avoid caching this result
         
         return chunk
 
@@ -327,4 +527,7 @@ async def enrich_code_chunks(
         Enriched chunks
     """
     enricher = CodeEnricher(api_key=api_key, model=model, mock_mode=mock_mode)
-    return await enricher.enrich_batch(chunks)
+    try:
+        return await enricher.enrich_batch(chunks)
+    finally:
+        await enricher.aclose()
@@ -1,6 +1,6 @@
 """Parser module for structural Java code analysis using tree-sitter."""
 
 from .java_parser import JavaCodeParser
-from .hierarchy_scanner import HierarchyScanner, build_project_map
+from .hierarchy_scanner import HierarchyScanner, build_project_map, find_java_files
 
-__all__ = ['JavaCodeParser', 'HierarchyScanner', 'build_project_map']
+__all__ = ['JavaCodeParser', 'HierarchyScanner', 'build_project_map', 'find_java_files']
@@ -3,14 +3,93 @@ Hierarchy Scanner for Java Projects.
 Builds a project-wide map of class inheritance and public methods.
 """
 
+import hashlib
+import multiprocessing
+import os
+import sqlite3
 import tree_sitter_java as tsjava
-from tree_sitter import Language, Parser
+from tree_sitter import Language, Node, Parser, Query, QueryCursor
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-import json
-from typing import Dict, List, Optional
+import orjson
+from typing import Dict, Iterator, List, Optional, Tuple
 from tqdm import tqdm
 
 
+# Parsed files written to the scan cache per transaction
+_CACHE_FLUSH_EVERY = 500
+
+# Layout of cached class info; bump whenever _extract_class_info's output
+# changes so caches from older scanners are dropped instead of served
+_CACHE_VERSION = 1
+
+# Scan caches live in the tool's own data dir, never in the scanned project
+_DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache"
+
+# Directories that never hold project sources
+_SKIP_DIRS = {'.git', 'node_modules', '.idea'}
+
+# Build output dirs, pruned only beside a build file so Java packages named
+# build/target are still scanned
+_BUILD_OUTPUT_DIRS = {'target', 'build'}
+_BUILD_FILES = {'pom.xml', 'build.gradle', 'build.gradle.kts'}
+
+
+def find_java_files(root_path: Path) -> List[Path]:
+    """
+    Collect .java files under root_path with os.scandir.
+    DirEntry type checks come from the directory listing itself, so non-Java
+    files cost no stat call or Path object; VCS/hidden dirs are pruned, and
+    build output dirs at a module root. Ingestion reuses this list, so
+    its paths match the file tags in the hierarchy map.
+    """
+    java_files = []
+    stack = [str(root_path)]
+    while stack:
+        subdirs = []
+        module_root = False
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIP_DIRS and not entry.name.startswith('.'):
+                        subdirs.append(entry)
+                elif entry.name.endswith('.java'):
+                    java_files.append(Path(entry.path))
+                elif entry.name in _BUILD_FILES:
+                    module_root = True
+        stack.extend(
+            entry.path for entry in subdirs
+            if not (module_root and entry.name in _BUILD_OUTPUT_DIRS)
+        )
+    return java_files
+
+
+def recycling_pool_context():
+    """
+    Start method for process pools that set max_tasks_per_child (fork is not
+    allowed there). forkserver forks each replacement worker from one warm
+    server process, so recycling costs a fork rather than a fresh interpreter
+    and module imports; spawn is the fallback where forkserver is missing
+    (Windows).
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+@lru_cache(maxsize=None)
+def _java_language() -> Language:
+    """Java grammar, loaded once per process and shared by all scanners."""
+    return Language(tsjava.language())
+
+
+@lru_cache(maxsize=None)
+def _class_query() -> Query:
+    """Compiled class-declaration query, shared by all scanners."""
+    return Query(_java_language(), "(class_declaration) @class")
+
+
 class HierarchyScanner:
     """
     Scans a Java project to build a hierarchy map of classes, parents, and methods.
@@ -18,16 +97,31 @@ class HierarchyScanner:
     
     def __init__(self):
         """Initialize the tree-sitter Java parser."""
-        self.JAVA_LANGUAGE = Language(tsjava.language())
+        self.JAVA_LANGUAGE = _java_language()
         self.parser = Parser(self.JAVA_LANGUAGE)
+        self.class_query = _class_query()
     
-    def build_project_map(self, root_path: str, output_file: str = "project_hierarchy.json") -> Dict:
+    def build_project_map(
+        self,
+        root_path: str,
+        output_file: str = "project_hierarchy.json",
+        max_workers: Optional[int] = None,
+        use_cache: bool = True,
+        cache_dir: Optional[str] = None,
+        java_files: Optional[List[Path]] = None
+    ) -> Dict:
         """
         Walk through all .java files and build a hierarchy map.
+        Files are parsed in a process pool; results are merged here.
+        Unchanged files are served from a SQLite cache, one per project root.
         
         Args:
             root_path: Root directory to scan for Java files
             output_file: Output JSON file path (relative to root_path or absolute)
+            max_workers: Parser processes (None = one per CPU, 1 = no pool)
+            use_cache: Reuse class info of unchanged files from earlier scans
+            cache_dir: Directory for the scan cache (None = this tool's data/cache)
+            java_files: Files already found under root_path (None = walk it here)
             
         Returns:
             Dictionary mapping class names to their metadata
@@ -38,39 +132,106 @@ class HierarchyScanner:
             raise FileNotFoundError(f"Root path not found: {root_path}")
         
         # Find all Java files
-        java_files = list(root_path.rglob("*.java"))
+        if java_files is None:
+            java_files = find_java_files(root_path)
         print(f"Found {len(java_files)} Java files")
         
-        # Build hierarchy map
-        hierarchy_map = {}
-        
-        print("Scanning files for class hierarchy...")
-        for java_file in tqdm(java_files, desc="Processing"):
-            try:
-                class_info = self._extract_class_info(java_file)
-                if class_info:
-                    # Add each class found in the file
-                    for class_name, info in class_info.items():
-                        hierarchy_map[class_name] = info
-            except Exception as e:
-                print(f"\n⚠️  Error processing {java_file}: {e}")
-                continue
-        
         # Determine output path
         if Path(output_file).is_absolute():
             output_path = Path(output_file)
         else:
             output_path = root_path / output_file
         
-        # Save to JSON
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(hierarchy_map, f, indent=2)
+        # Class info per file: cache hits first, then freshly parsed files
+        cache = None
+        if use_cache:
+            cache_dir = Path(cache_dir or _DEFAULT_CACHE_DIR)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            root_key = hashlib.blake2b(str(root_path.resolve()).encode(), digest_size=8).hexdigest()
+            cache = _ScanCache(cache_dir / f"hierarchy_{root_key}.sqlite")
+        file_infos = {}
+        to_parse = java_files
+        if cache is not None:
+            file_infos, to_parse = cache.lookup(java_files)
+            print(f"Cache: {len(file_infos)} unchanged, {len(to_parse)} to parse")
+        
+        print("Scanning files for class hierarchy...")
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = 32
+        
+        # A pool only pays off once there is more than a chunk per worker
+        if max_workers == 1 or len(to_parse) <= chunksize:
+            results = map(self._scan_file, to_parse)
+            pool = None
+        else:
+            # Recycle workers now and then so heap growth from large files
+            # (trees are freed, but the allocator keeps the pages) is returned
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=recycling_pool_context(),
+                max_tasks_per_child=200
+            )
+            results = pool.map(_scan_file_worker, to_parse, chunksize=chunksize)
+        
+        try:
+            progress = tqdm(
+                results,
+                total=len(to_parse),
+                desc="Processing",
+                unit="file",
+                mininterval=0.5,   # Throttle redraws; most files parse in well under a millisecond
+                miniters=100
+            )
+            # Results reach the cache in batches as they arrive, so an
+            # interrupted scan resumes from where it stopped
+            unsaved = {}
+            for java_file, class_info, error in progress:
+                if error:
+                    print(f"\n⚠️  Error processing {java_file}: {error}")
+                    continue
+                file_infos[java_file] = class_info
+                if cache is not None:
+                    unsaved[java_file] = class_info
+                    if len(unsaved) >= _CACHE_FLUSH_EVERY:
+                        cache.store(unsaved)
+                        unsaved = {}
+            
+            if cache is not None:
+                cache.store(unsaved)
+                cache.finish()
+                cache = None
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if cache is not None:
+                cache.close()
+        
+        # Merge in file order so later duplicates win, as in a sequential scan
+        hierarchy_map = {}
+        saved_map = {}
+        for java_file in java_files:
+            # Add each class found in the file; the returned map also tags it
+            # with where it lives (for incremental ingestion), the JSON does
+            # not, so it carries no machine-specific paths
+            for class_name, info in file_infos.get(java_file, {}).items():
+                hierarchy_map[class_name] = {**info, "file": str(java_file)}
+                saved_map[class_name] = info
+        
+        # Save to JSON, sorted so the file does not depend on directory order
+        output_path.write_bytes(orjson.dumps(dict(sorted(saved_map.items())), option=orjson.OPT_INDENT_2))
         
         print(f"\n✓ Hierarchy map saved to: {output_path}")
         print(f"✓ Total classes mapped: {len(hierarchy_map)}")
         
         return hierarchy_map
     
+    def _scan_file(self, file_path: Path) -> Tuple[Path, Dict[str, Dict], Optional[str]]:
+        """Extract class info for one file, reporting errors instead of raising."""
+        try:
+            return file_path, self._extract_class_info(file_path), None
+        except Exception as e:
+            return file_path, {}, str(e)
+    
     def _extract_class_info(self, file_path: Path) -> Dict[str, Dict]:
         """
         Extract class information from a single Java file.
@@ -78,31 +239,33 @@ class HierarchyScanner:
         Returns:
             Dictionary mapping class names to their info (parent, methods)
         """
-        # Read source code
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            source_code = f.read()
+        # Read raw bytes: tree-sitter parses them directly and node offsets are byte offsets
+        source_bytes = file_path.read_bytes()
         
         # Parse
-        tree = self.parser.parse(bytes(source_code, 'utf8'))
+        tree = self.parser.parse(source_bytes)
         root_node = tree.root_node
         
         # Extract package name for fully qualified names
-        package_name = self._extract_package_name(root_node, source_code)
+        package_name = self._extract_package_name(root_node, source_bytes)
         
         # Find all classes in this file
-        class_info = {}
-        class_nodes = self._find_nodes_by_type(root_node, 'class_declaration')
+        class_info: Dict[str, Dict] = {}
+        class_nodes = sorted(
+            QueryCursor(self.class_query).captures(root_node).get('class', []),
+            key=lambda n: n.start_byte
+        )
         
         for class_node in class_nodes:
-            class_name = self._get_class_name(class_node, source_code)
+            class_name = self._get_class_name(class_node, source_bytes)
             if not class_name:
                 continue
             
             # Get parent class (extends)
-            parent_name = self._get_parent_class(class_node, source_code)
+            parent_name = self._get_parent_class(class_node, source_bytes)
             
             # Get public method names
-            public_methods = self._get_public_method_names(class_node, source_code)
+            public_methods = self._get_public_method_names(class_node, source_bytes)
             
             # Store with fully qualified name if package exists
             if package_name and package_name != "None":
@@ -118,79 +281,80 @@ class HierarchyScanner:
         
         return class_info
     
-    def _find_nodes_by_type(self, node, node_type: str) -> List:
-        """Recursively find all nodes of a specific type."""
-        results = []
-        
-        if node.type == node_type:
-            results.append(node)
-        
-        for child in node.children:
-            results.extend(self._find_nodes_by_type(child, node_type))
-        
-        return results
+    def _iter_children(self, node: Node) -> Iterator[Node]:
+        """Yield a node's children through a TreeCursor instead of materializing .children."""
+        cursor = node.walk()
+        if not cursor.goto_first_child():
+            return
+        while True:
+            yield cursor.node
+            if not cursor.goto_next_sibling():
+                return
+    
+    def _node_text(self, source_bytes: bytes, node: Node) -> str:
+        """Decode the source of one node (newlines normalized as text-mode reads did)."""
+        text = source_bytes[node.start_byte:node.end_byte].decode('utf-8', 'ignore')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
     
-    def _extract_package_name(self, root_node, source_code: str) -> str:
+    def _extract_package_name(self, root_node: Node, source_bytes: bytes) -> str:
         """Extract the package name from the file."""
-        for child in root_node.children:
+        for child in self._iter_children(root_node):
             if child.type == 'package_declaration':
-                for package_child in child.children:
+                for package_child in self._iter_children(child):
                     if package_child.type in ['scoped_identifier', 'identifier']:
-                        return source_code[package_child.start_byte:package_child.end_byte]
+                        return self._node_text(source_bytes, package_child)
         return "None"
     
-    def _get_class_name(self, class_node, source_code: str) -> Optional[str]:
+    def _get_class_name(self, class_node: Node, source_bytes: bytes) -> Optional[str]:
         """Extract the class name from a class declaration node."""
-        for child in class_node.children:
-            if child.type == 'identifier':
-                return child.text.decode('utf8')
+        name_node = class_node.child_by_field_name('name')
+        if name_node is not None:
+            return name_node.text.decode('utf8')
         return None
     
-    def _get_parent_class(self, class_node, source_code: str) -> Optional[str]:
+    def _get_parent_class(self, class_node: Node, source_bytes: bytes) -> Optional[str]:
         """
         Extract the parent class name from extends clause.
         Returns None if class doesn't extend anything.
         """
-        for child in class_node.children:
-            if child.type == 'superclass':
-                # The superclass node contains the type being extended
-                for superclass_child in child.children:
-                    if superclass_child.type in ['type_identifier', 'generic_type', 'scoped_type_identifier']:
-                        parent_name = source_code[superclass_child.start_byte:superclass_child.end_byte]
-                        # Clean up generics if present
-                        if '<' in parent_name:
-                            parent_name = parent_name.split('<')[0]
-                        return parent_name.strip()
+        # Field lookups are resolved natively, no walk over the class's children
+        superclass = class_node.child_by_field_name('superclass')
+        if superclass is not None:
+            # The superclass node contains the type being extended
+            for superclass_child in self._iter_children(superclass):
+                if superclass_child.type in ['type_identifier', 'generic_type', 'scoped_type_identifier']:
+                    parent_name = self._node_text(source_bytes, superclass_child)
+                    # Clean up generics if present
+                    if '<' in parent_name:
+                        parent_name = parent_name.split('<')[0]
+                    return parent_name.strip()
         return None
     
-    def _get_public_method_names(self, class_node, source_code: str) -> List[str]:
+    def _get_public_method_names(self, class_node: Node, source_bytes: bytes) -> List[str]:
         """
         Extract names of all public methods in this class.
         """
-        method_names = []
+        method_names: List[str] = []
         
-        # Find class body
-        class_body = None
-        for child in class_node.children:
-            if child.type == 'class_body':
-                class_body = child
-                break
+        # Find the class body (single pass over its members below)
+        class_body = class_node.child_by_field_name('body')
         
         if not class_body:
             return method_names
         
         # Find all method declarations
-        for child in class_body.children:
+        for child in self._iter_children(class_body):
             if child.type == 'method_declaration':
                 # Check if public
                 is_public = False
-                method_name = None
+                method_name: Optional[str] = None
                 
-                for method_child in child.children:
+                for method_child in self._iter_children(child):
                     if method_child.type == 'modifiers':
-                        modifiers_text = source_code[method_child.start_byte:method_child.end_byte]
-                        if 'public' in modifiers_text:
-                            is_public = True
+                        # Each modifier keyword is its own node type
+                        is_public = any(m.type == 'public' for m in self._iter_children(method_child))
                     elif method_child.type == 'identifier':
                         method_name = method_child.text.decode('utf8')
                 
@@ -200,19 +364,139 @@ class HierarchyScanner:
         return method_names
 
 
-def build_project_map(root_path: str, output_file: str = "project_hierarchy.json") -> Dict:
+class _ScanCache:
+    """
+    SQLite cache of per-file class info, keyed by path and content hash.
+    Files whose mtime and size are unchanged are not even read. The schema
+    version lives in PRAGMA user_version; a mismatch empties the cache.
+    """
+    
+    def __init__(self, db_path: Path):
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != _CACHE_VERSION:
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS cache")
+                self.conn.execute(f"PRAGMA user_version = {_CACHE_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, hash TEXT, payload BLOB)"
+        )
+        self._rows = {
+            row[0]: row[1:]
+            for row in self.conn.execute("SELECT path, mtime_ns, size, hash, payload FROM cache")
+        }
+        self._stats = {}
+        self._hashes = {}
+        self._touched = []
+        self._removed = []
+    
+    def lookup(self, java_files: List[Path]) -> Tuple[Dict[Path, Dict], List[Path]]:
+        """
+        Split files into cached class info and files that must be parsed.
+        
+        Returns:
+            Tuple of (file -> class info for hits, files to parse)
+        """
+        hits = {}
+        misses = []
+        
+        for java_file in java_files:
+            key = str(java_file)
+            try:
+                stat = java_file.stat()
+                self._stats[key] = (stat.st_mtime_ns, stat.st_size)
+                row = self._rows.get(key)
+                
+                # Cheap check first: untouched files skip reading and hashing
+                if row and (row[0], row[1]) == self._stats[key]:
+                    hits[java_file] = orjson.loads(row[3])
+                    continue
+                
+                content_hash = hashlib.blake2b(java_file.read_bytes(), digest_size=16).hexdigest()
+            except OSError:
+                # Vanished or unreadable: a miss, so the scan reports the error
+                misses.append(java_file)
+                continue
+            self._hashes[key] = content_hash
+            if row and row[2] == content_hash:
+                # Touched but identical content
+                hits[java_file] = orjson.loads(row[3])
+                self._touched.append(key)
+                continue
+            
+            misses.append(java_file)
+        
+        # Forget files that no longer exist
+        self._removed = [key for key in self._rows if key not in self._stats]
+        return hits, misses
+    
+    def store(self, parsed: Dict[Path, Dict]):
+        """Save freshly parsed files in one transaction (called per batch as results arrive)."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                [
+                    (str(f), *self._stats[str(f)], self._hashes[str(f)], orjson.dumps(info))
+                    for f, info in parsed.items()
+                    if str(f) in self._hashes  # Unreadable at lookup: nothing to key on
+                ]
+            )
+    
+    def finish(self):
+        """Refresh touched files, drop removed ones and close the database."""
+        with self.conn:
+            # Content hits with a new mtime: record the new stat so the next run skips hashing
+            self.conn.executemany(
+                "UPDATE cache SET mtime_ns = ?, size = ? WHERE path = ?",
+                [(*self._stats[key], key) for key in self._touched]
+            )
+            self.conn.executemany("DELETE FROM cache WHERE path = ?", [(key,) for key in self._removed])
+        self.close()
+    
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+
+# Scanner owned by each worker process (tree-sitter parsers can't be pickled,
+# so every process builds its own on first use)
+_worker_scanner: Optional[HierarchyScanner] = None
+
+
+def _scan_file_worker(file_path: Path) -> Tuple[Path, Dict[str, Dict], Optional[str]]:
+    """Extract class info for one file inside a worker process."""
+    global _worker_scanner
+    
+    if _worker_scanner is None:
+        _worker_scanner = HierarchyScanner()
+    return _worker_scanner._scan_file(file_path)
+
+
+def build_project_map(
+    root_path: str,
+    output_file: str = "project_hierarchy.json",
+    cache_dir: Optional[str] = None,
+    java_files: Optional[List[Path]] = None,
+    use_cache: bool = True
+) -> Dict:
     """
     Convenience function to build project hierarchy map.
     
     Args:
         root_path: Root directory to scan for Java files
         output_file: Output JSON file path
+        cache_dir: Directory for the scan cache (None = this tool's data/cache)
+        java_files: Files already found under root_path (None = walk it here)
+        use_cache: Reuse class info of unchanged files from earlier scans
         
     Returns:
         Dictionary mapping class names to their metadata
     """
     scanner = HierarchyScanner()
-    return scanner.build_project_map(root_path, output_file)
+    return scanner.build_project_map(
+        root_path, output_file, use_cache=use_cache, cache_dir=cache_dir, java_files=java_files
+    )
 
 
 if __name__ == "__main__":
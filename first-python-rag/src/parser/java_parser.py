@@ -3,10 +3,101 @@ Java Code Parser using Tree-Sitter for structural code analysis.
 Extracts classes, fields, and public methods from Java source files.
 """
 
+import hashlib
+import os
+import pickle
+import sys
+import orjson
 import tree_sitter_java as tsjava
-from tree_sitter import Language, Parser
+from tree_sitter import Language, Node, Parser, Query, QueryCursor
+from functools import lru_cache
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+
+
+# Declarations parse_file needs, matched in one native pass over the tree
+_DECLARATION_QUERY = """
+(class_declaration) @class
+(method_declaration) @method
+(constructor_declaration) @constructor
+"""
+
+
+# Node kinds that hold a method's return type
+_RETURN_TYPE_KINDS = frozenset({
+    'type_identifier', 'void_type', 'integral_type', 'floating_point_type',
+    'boolean_type', 'generic_type', 'array_type', 'scoped_type_identifier'
+})
+
+# Node kinds that hold a parameter's type
+_PARAM_TYPE_KINDS = _RETURN_TYPE_KINDS
+
+# Node kinds that hold a method or constructor body
+_BODY_KINDS = frozenset({'block', 'constructor_body'})
+
+
+# Primitive types and common Java types that are not treated as dependencies
+_COMMON_TYPES = frozenset({
+    # Primitives
+    'int', 'Integer', 'long', 'Long', 'short', 'Short',
+    'byte', 'Byte', 'float', 'Float', 'double', 'Double',
+    'boolean', 'Boolean', 'char', 'Character',
+    'void', 'Void',
+    # Common Java types
+    'String', 'Object',
+    # Common collections (often interfaces, don't need constructors)
+    'List', 'ArrayList', 'Set', 'HashSet', 'Map', 'HashMap',
+    'Collection', 'Iterable', 'Iterator',
+    # Other common types
+    'Optional', 'Stream'
+})
+
+
+@lru_cache(maxsize=4096)
+def _complex_types(parameter_types: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Custom types in a parameter list, de-duplicated in order (cached per type tuple)."""
+    return tuple(dict.fromkeys(t for t in parameter_types if t not in _COMMON_TYPES))
+
+
+@lru_cache(maxsize=None)
+def _java_language() -> Language:
+    """Java grammar, loaded once per process and shared by all parsers."""
+    return Language(tsjava.language())
+
+
+@lru_cache(maxsize=None)
+def _declaration_query() -> Query:
+    """Compiled _DECLARATION_QUERY, shared by all parsers."""
+    return Query(_java_language(), _DECLARATION_QUERY)
+
+
+def _load_json_fast(path: str) -> Any:
+    """Load a JSON file with orjson (much faster than stdlib json on large maps)."""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+# Hierarchy maps loaded from disk: absolute path -> ((mtime_ns, size), map)
+_HIERARCHY_CACHE: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+
+def _load_hierarchy_cached(path: str) -> Dict:
+    """
+    Load a hierarchy map JSON once per process.
+    Parsers built from the same unchanged file share one map; a rewritten
+    file (new mtime or size) is read again.
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _HIERARCHY_CACHE.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    hierarchy_map = _load_json_fast(key)
+    _HIERARCHY_CACHE[key] = (version, hierarchy_map)
+    return hierarchy_map
 
 
 class JavaCodeParser:
@@ -16,21 +107,31 @@ class JavaCodeParser:
     Supports inheritance context from project hierarchy.
     """
     
-    def __init__(self, hierarchy_map_path: Optional[str] = None):
+    def __init__(
+        self,
+        hierarchy_map_path: Optional[str] = None,
+        hierarchy_map: Optional[Dict] = None
+    ):
         """
         Initialize the tree-sitter Java parser.
         
         Args:
             hierarchy_map_path: Optional path to project_hierarchy.json file
                                for inheritance context support
+            hierarchy_map: Optional already-loaded hierarchy map (takes
+                          precedence over hierarchy_map_path)
         """
-        self.JAVA_LANGUAGE = Language(tsjava.language())
+        self.JAVA_LANGUAGE = _java_language()
         self.parser = Parser(self.JAVA_LANGUAGE)
+        self.declaration_query = _declaration_query()
         
         # Load hierarchy map if provided
         self.hierarchy_map = {}
-        if hierarchy_map_path:
+        if hierarchy_map is not None:
+            self.hierarchy_map = hierarchy_map
+        elif hierarchy_map_path:
             self._load_hierarchy_map(hierarchy_map_path)
+        self._index_hierarchy()
     
     def parse_file(self, file_path: str) -> List[Dict[str, str]]:
         """
@@ -46,135 +147,164 @@ class JavaCodeParser:
             - method_signature: Full normalized method signature
             - method_body: Complete method code
             - class_context: Package name, class name and field definitions
+            - class_info: Parsed package, class_name and inherited_methods (shared per class)
+            
+            Each member is reported once, under its nearest enclosing named
+            class: nested-class methods belong to the nested class only, and
+            anonymous-class methods belong to the class that contains them.
         """
         file_path = Path(file_path)
         
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Read the source code
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            source_code = f.read()
+        # Read raw bytes: tree-sitter parses them directly and node offsets are byte offsets
+        source_bytes = file_path.read_bytes()
         
         # Parse the code
-        tree = self.parser.parse(bytes(source_code, 'utf8'))
+        tree = self.parser.parse(source_bytes)
         root_node = tree.root_node
         
         # Extract package name
-        package_name = self._extract_package_name(root_node, source_code)
+        package_name = self._extract_package_name(root_node, source_bytes)
         
         # Extract all methods with context
         results = []
         
-        # Find all class declarations
-        for class_node in self._find_nodes_by_type(root_node, 'class_declaration'):
+        # Find all declarations in one query, then attribute members to their class
+        captures = QueryCursor(self.declaration_query).captures(root_node)
+        methods_by_class = self._group_by_class(captures.get('method', []))
+        constructors_by_class = self._group_by_class(captures.get('constructor', []))
+        
+        # Captures are grouped by pattern, not document order; sort to keep chunk order stable
+        for class_node in sorted(captures.get('class', []), key=lambda n: n.start_byte):
             class_name = self._get_class_name(class_node)
-            fields = self._extract_fields(class_node, source_code)
+            fields = self._extract_fields(class_node, source_bytes)
             
             # Extract parent class for inheritance context
-            parent_class = self._get_parent_class(class_node, source_code)
+            parent_class = self._get_parent_class(class_node, source_bytes)
+            
+            # Look up inherited methods once per class
+            inherited_methods = self._get_inherited_methods(parent_class) if parent_class else []
             
             # Build class context with inheritance
             class_context = self._format_class_context(
                 package_name, 
                 class_name, 
                 fields, 
-                parent_class
+                parent_class,
+                inherited_methods
             )
             
-            # Extract public methods from this class
-            for method_node in self._find_nodes_by_type(class_node, 'method_declaration'):
-                if self._is_public_method(method_node, source_code):
-                    method_info = self._extract_method_info(
-                        method_node, 
-                        source_code, 
-                        class_context,
-                        class_name,
-                        is_constructor=False
-                    )
-                    
-                    # Filter out empty methods
-                    if method_info and not self._is_empty_method(method_info['method_body']):
-                        # Generate unique ID for this method
-                        method_info['id'] = self._generate_method_id(
-                            class_context, 
-                            method_info['method_signature']
-                        )
-                        results.append(method_info)
+            # Structured copy of the context, shared by every method of this class
+            # (saves the vector store re-parsing the class_context string per chunk)
+            class_info = {
+                'package': package_name or 'None',
+                'class_name': class_name,
+                'inherited_methods': inherited_methods
+            }
             
-            # Extract public constructors from this class
-            for constructor_node in self._find_nodes_by_type(class_node, 'constructor_declaration'):
-                if self._is_public_method(constructor_node, source_code):
-                    constructor_info = self._extract_method_info(
-                        constructor_node,
-                        source_code,
-                        class_context,
-                        class_name,
-                        is_constructor=True
-                    )
-                    
-                    # Filter out empty constructors
-                    if constructor_info and not self._is_empty_method(constructor_info['method_body']):
-                        # Generate unique ID for this constructor
-                        constructor_info['id'] = self._generate_method_id(
-                            class_context,
-                            constructor_info['method_signature']
-                        )
-                        results.append(constructor_info)
+            # Hash the class context once; each member ID extends a copy of it
+            id_hasher = self._method_id_hasher(class_context)
+            
+            # Extract public methods, then public constructors, from this class
+            members = [(node, False) for node in methods_by_class.get(class_node, [])]
+            members += [(node, True) for node in constructors_by_class.get(class_node, [])]
+            for member_node, is_constructor in members:
+                # Cheap tree checks first: skip non-public and empty members
+                # before any text is extracted
+                if not self._is_public_method(member_node, source_bytes) or self._has_empty_body(member_node):
+                    continue
+                
+                member_info = self._extract_method_info(
+                    member_node,
+                    source_bytes,
+                    class_context,
+                    class_name,
+                    is_constructor=is_constructor
+                )
+                if not member_info:
+                    continue
+                
+                member_info['class_info'] = class_info
+                # Generate unique ID for this method/constructor
+                member_info['id'] = self._generate_method_id(
+                    class_context,
+                    member_info['method_signature'],
+                    id_hasher
+                )
+                results.append(member_info)
         
         return results
     
-    def _find_nodes_by_type(self, node, node_type: str) -> List:
-        """Recursively find all nodes of a specific type."""
-        results = []
-        
-        if node.type == node_type:
-            results.append(node)
-        
-        for child in node.children:
-            results.extend(self._find_nodes_by_type(child, node_type))
+    def _group_by_class(self, nodes: List[Node]) -> Dict[Node, List[Node]]:
+        """
+        Group member nodes by their nearest enclosing class declaration.
         
-        return results
+        Members of a nested class belong to the nested class only; members of
+        anonymous classes stay with the named class that contains them.
+        """
+        groups: Dict[Node, List[Node]] = {}
+        for node in sorted(nodes, key=lambda n: n.start_byte):
+            owner = node.parent
+            while owner is not None and owner.type != 'class_declaration':
+                owner = owner.parent
+            if owner is not None:
+                groups.setdefault(owner, []).append(node)
+        return groups
+    
+    def _iter_children(self, node: Node) -> Iterator[Node]:
+        """Yield a node's children through a TreeCursor instead of materializing .children."""
+        cursor = node.walk()
+        if not cursor.goto_first_child():
+            return
+        while True:
+            yield cursor.node
+            if not cursor.goto_next_sibling():
+                return
     
-    def _extract_package_name(self, root_node, source_code: str) -> str:
+    def _node_text(self, source_bytes: bytes, node: Node) -> str:
+        """Decode the source of one node (newlines normalized as text-mode reads did)."""
+        text = source_bytes[node.start_byte:node.end_byte].decode('utf-8', 'ignore')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    
+    def _extract_package_name(self, root_node: Node, source_bytes: bytes) -> str:
         """Extract the package name from the file."""
-        for child in root_node.children:
+        for child in self._iter_children(root_node):
             if child.type == 'package_declaration':
                 # Find the scoped_identifier or identifier within package declaration
-                for package_child in child.children:
+                for package_child in self._iter_children(child):
                     if package_child.type in ['scoped_identifier', 'identifier']:
-                        return source_code[package_child.start_byte:package_child.end_byte]
+                        return self._node_text(source_bytes, package_child)
                 # Fallback: extract text between 'package' and ';'
-                package_text = source_code[child.start_byte:child.end_byte]
+                package_text = self._node_text(source_bytes, child)
                 package_text = package_text.replace('package', '').replace(';', '').strip()
                 return package_text
         return "None"
     
-    def _get_class_name(self, class_node) -> str:
+    def _get_class_name(self, class_node: Node) -> str:
         """Extract the class name from a class declaration node."""
-        for child in class_node.children:
-            if child.type == 'identifier':
-                return child.text.decode('utf8')
+        name_node = class_node.child_by_field_name('name')
+        if name_node is not None:
+            return name_node.text.decode('utf8')
         return "UnknownClass"
     
-    def _extract_fields(self, class_node, source_code: str) -> List[str]:
+    def _extract_fields(self, class_node: Node, source_bytes: bytes) -> List[str]:
         """Extract all field declarations from a class."""
-        fields = []
+        fields: List[str] = []
         
-        # Find the class body
-        class_body = None
-        for child in class_node.children:
-            if child.type == 'class_body':
-                class_body = child
-                break
+        # Find the class body (single pass over its members below)
+        class_body = class_node.child_by_field_name('body')
         
         if not class_body:
             return fields
         
         # Extract field declarations
-        for child in class_body.children:
+        for child in self._iter_children(class_body):
             if child.type == 'field_declaration':
-                field_text = source_code[child.start_byte:child.end_byte].strip()
+                field_text = self._node_text(source_bytes, child).strip()
                 # Clean up the field text (remove newlines, extra spaces)
                 field_text = ' '.join(field_text.split())
                 fields.append(field_text)
@@ -186,10 +316,12 @@ class JavaCodeParser:
         package_name: str, 
         class_name: str, 
         fields: List[str],
-        parent_class: Optional[str] = None
+        parent_class: Optional[str] = None,
+        inherited_methods: Optional[List[str]] = None
     ) -> str:
         """
         Format the class context string with package, class, fields, and inheritance.
+        Inherited methods are looked up from the hierarchy map unless supplied.
         """
         package_str = f"Package: {package_name}" if package_name else "Package: None"
         
@@ -205,26 +337,27 @@ class JavaCodeParser:
             context += f", Extends: {parent_class}"
             
             # Look up inherited methods from hierarchy map
-            inherited_methods = self._get_inherited_methods(parent_class)
+            if inherited_methods is None:
+                inherited_methods = self._get_inherited_methods(parent_class)
             if inherited_methods:
                 methods_str = ", ".join(inherited_methods)
                 context += f", Inherited Methods: [{methods_str}]"
         
         return context
     
-    def _is_public_method(self, method_node, source_code: str) -> bool:
+    def _is_public_method(self, method_node: Node, source_bytes: bytes) -> bool:
         """Check if a method has the public modifier."""
-        # Look for modifiers node
-        for child in method_node.children:
-            if child.type == 'modifiers':
-                modifiers_text = source_code[child.start_byte:child.end_byte]
-                return 'public' in modifiers_text
-        return False
+        # The grammar puts modifiers first; each keyword is its own node type,
+        # so annotations like @publicApi can't match
+        modifiers = method_node.child(0)
+        if modifiers is None or modifiers.type != 'modifiers':
+            return False
+        return any(child.type == 'public' for child in self._iter_children(modifiers))
     
     def _extract_method_info(
         self, 
-        method_node, 
-        source_code: str, 
+        method_node: Node, 
+        source_bytes: bytes, 
         class_context: str,
         class_name: str,
         is_constructor: bool = False
@@ -238,36 +371,36 @@ class JavaCodeParser:
         For constructors:
         [Modifiers] <Constructor> [ClassName]([Parameters])
         """
-        method_name = None
-        method_body = None
-        modifiers = []
-        return_type = None
-        parameters = []
-        parameter_types = []
+        method_name: Optional[str] = None
+        method_body: Optional[str] = None
+        modifiers: List[str] = []
+        return_type: Optional[str] = None
+        parameters: List[str] = []
+        parameter_types: List[str] = []
         
         # Extract components from method node
-        for child in method_node.children:
-            if child.type == 'modifiers':
+        for child in self._iter_children(method_node):
+            kind = child.type
+            if kind == 'modifiers':
                 # Extract all modifiers (public, static, final, etc.)
-                modifiers_text = source_code[child.start_byte:child.end_byte]
+                modifiers_text = self._node_text(source_bytes, child)
                 modifiers = modifiers_text.split()
                 
-            elif child.type == 'identifier':
+            elif kind == 'identifier':
                 # Method name (for constructors, this is the class name)
                 method_name = child.text.decode('utf8')
                 
-            elif child.type in ['type_identifier', 'void_type', 'integral_type', 'floating_point_type', 
-                                'boolean_type', 'generic_type', 'array_type', 'scoped_type_identifier']:
+            elif kind in _RETURN_TYPE_KINDS:
                 # Return type (not present for constructors)
-                return_type = source_code[child.start_byte:child.end_byte].strip()
+                return_type = self._node_text(source_bytes, child).strip()
                 
-            elif child.type == 'formal_parameters':
+            elif kind == 'formal_parameters':
                 # Extract parameters and their types
-                parameters, parameter_types = self._extract_parameters_with_types(child, source_code)
+                parameters, parameter_types = self._extract_parameters_with_types(child, source_bytes)
                 
-            elif child.type in ['block', 'constructor_body']:
+            elif kind in _BODY_KINDS:
                 # Method body
-                method_body = source_code[child.start_byte:child.end_byte].strip()
+                method_body = self._node_text(source_bytes, child).strip()
         
         # Handle constructor naming
         if is_constructor:
@@ -278,7 +411,7 @@ class JavaCodeParser:
         
         # If we didn't find a body, extract the entire method
         if not method_body:
-            method_body = source_code[method_node.start_byte:method_node.end_byte].strip()
+            method_body = self._node_text(source_bytes, method_node).strip()
         
         # Extract dependency types (filter out primitives and common types)
         dependency_types = self._filter_complex_types(parameter_types)
@@ -288,7 +421,7 @@ class JavaCodeParser:
         params_str = ', '.join(parameters) if parameters else ''
         
         # Construct the complete signature
-        signature_parts = []
+        signature_parts: List[str] = []
         if modifiers_str:
             signature_parts.append(modifiers_str)
         
@@ -310,27 +443,21 @@ class JavaCodeParser:
             'dependency_types': dependency_types
         }
     
-    def _is_empty_method(self, method_body: str) -> bool:
-        """Check if a method body is empty or only contains whitespace/comments."""
-        # Remove the surrounding braces and whitespace
-        body = method_body.strip()
-        if body.startswith('{') and body.endswith('}'):
-            body = body[1:-1].strip()
-        
-        # Check if empty or only has comments
-        if not body:
-            return True
-        
-        # Simple check for single-line or multi-line comments only
-        lines = [line.strip() for line in body.split('\n')]
-        non_comment_lines = [
-            line for line in lines 
-            if line and not line.startswith('//') and not line.startswith('/*') and not line.startswith('*')
-        ]
-        
-        return len(non_comment_lines) == 0
+    def _has_empty_body(self, method_node: Node) -> bool:
+        """
+        Check on the tree whether a method/constructor body holds only comments.
+        Declarations without a body (abstract, interface) are not empty.
+        """
+        body = method_node.child_by_field_name('body')
+        if body is None:
+            return False
+        # Braces and semicolons are anonymous nodes; comments are extras
+        for child in self._iter_children(body):
+            if child.is_named and not child.is_extra:
+                return False
+        return True
     
-    def _extract_parameters(self, formal_params_node, source_code: str) -> List[str]:
+    def _extract_parameters(self, formal_params_node: Node, source_bytes: bytes) -> List[str]:
         """
         Extract parameters from a formal_parameters node.
         
@@ -339,10 +466,10 @@ class JavaCodeParser:
         
         This is a convenience wrapper around _extract_parameters_with_types.
         """
-        parameters, _ = self._extract_parameters_with_types(formal_params_node, source_code)
+        parameters, _ = self._extract_parameters_with_types(formal_params_node, source_bytes)
         return parameters
     
-    def _extract_parameters_with_types(self, formal_params_node, source_code: str) -> tuple[List[str], List[str]]:
+    def _extract_parameters_with_types(self, formal_params_node: Node, source_bytes: bytes) -> Tuple[List[str], List[str]]:
         """
         Extract parameters from a formal_parameters node with type information.
         
@@ -351,23 +478,22 @@ class JavaCodeParser:
             - formatted_parameters: ["Type paramName", ...]
             - parameter_types: ["Type", ...] (raw types for dependency analysis)
         """
-        parameters = []
-        parameter_types = []
+        parameters: List[str] = []
+        parameter_types: List[str] = []
         
-        for child in formal_params_node.children:
+        for child in self._iter_children(formal_params_node):
             if child.type == 'formal_parameter':
-                param_type = None
-                param_name = None
+                param_type: Optional[str] = None
+                param_name: Optional[str] = None
                 
-                for param_child in child.children:
+                for param_child in self._iter_children(child):
+                    kind = param_child.type
                     # Extract parameter type
-                    if param_child.type in ['type_identifier', 'integral_type', 'floating_point_type',
-                                           'boolean_type', 'generic_type', 'array_type', 
-                                           'scoped_type_identifier', 'void_type']:
-                        param_type = source_code[param_child.start_byte:param_child.end_byte].strip()
+                    if kind in _PARAM_TYPE_KINDS:
+                        param_type = self._node_text(source_bytes, param_child).strip()
                     
                     # Extract parameter name
-                    elif param_child.type == 'identifier':
+                    elif kind == 'identifier':
                         param_name = param_child.text.decode('utf8')
                 
                 # Store the type for dependency tracking
@@ -387,30 +513,31 @@ class JavaCodeParser:
         
         return parameters, parameter_types
     
-    def _generate_method_id(self, class_context: str, method_signature: str) -> str:
+    def _method_id_hasher(self, class_context: str) -> Any:
+        """Hasher primed with a class context, to be copied per method."""
+        return hashlib.blake2b(f"{class_context}::".encode('utf-8'), digest_size=16)
+    
+    def _generate_method_id(self, class_context: str, method_signature: str, base_hasher=None) -> str:
         """
         Generate a unique ID for a method based on its class context and signature.
         
         This ensures overloaded methods get different IDs.
-        Uses SHA256 hash for consistent, unique identification.
-        """
-        import hashlib
-        
-        # Combine class context and signature for uniqueness
-        unique_string = f"{class_context}::{method_signature}"
+        Uses a 128-bit BLAKE2b hash (32 hex chars) for consistent, unique identification.
         
-        # Generate hash
-        hash_object = hashlib.sha256(unique_string.encode('utf-8'))
-        method_id = hash_object.hexdigest()
-        
-        return method_id
+        Args:
+            class_context: Class context string of the method's class
+            method_signature: Normalized method signature
+            base_hasher: Optional hasher from _method_id_hasher(class_context),
+                        so the context is not re-hashed for every method
+        """
+        hasher = (base_hasher or self._method_id_hasher(class_context)).copy()
+        hasher.update(method_signature.encode('utf-8'))
+        return hasher.hexdigest()
     
-    def _load_hierarchy_map(self, hierarchy_map_path: str):
+    def _load_hierarchy_map(self, hierarchy_map_path: str) -> None:
         """Load the project hierarchy map from JSON file."""
-        import json
         try:
-            with open(hierarchy_map_path, 'r', encoding='utf-8') as f:
-                self.hierarchy_map = json.load(f)
+            self.hierarchy_map = _load_hierarchy_cached(hierarchy_map_path)
             print(f"✓ Loaded hierarchy map with {len(self.hierarchy_map)} classes")
         except FileNotFoundError:
             print(f"⚠️  Hierarchy map not found: {hierarchy_map_path}")
@@ -419,21 +546,42 @@ class JavaCodeParser:
             print(f"⚠️  Error loading hierarchy map: {e}")
             self.hierarchy_map = {}
     
-    def _get_parent_class(self, class_node, source_code: str) -> Optional[str]:
+    def _index_hierarchy(self) -> None:
+        """
+        Index the hierarchy map by simple class name and reset the inheritance cache.
+        
+        Names are interned in place: parent and method names repeat across
+        thousands of classes, and shared strings also shrink the pickled map
+        that main_ingest hands to worker processes.
+        """
+        self._by_simple_name: Dict[str, Dict] = {}
+        for class_name, info in self.hierarchy_map.items():
+            simple_name = sys.intern(info.get('simple_name') or class_name.rsplit('.', 1)[-1])
+            info['simple_name'] = simple_name
+            if info.get('parent'):
+                info['parent'] = sys.intern(info['parent'])
+            if info.get('methods'):
+                info['methods'] = [sys.intern(name) for name in info['methods']]
+            # First class wins, matching the old linear scan
+            self._by_simple_name.setdefault(simple_name, info)
+        self._inherited_cache: Dict[str, List[str]] = {}
+    
+    def _get_parent_class(self, class_node: Node, source_bytes: bytes) -> Optional[str]:
         """
         Extract the parent class name from extends clause.
         Returns None if class doesn't extend anything.
         """
-        for child in class_node.children:
-            if child.type == 'superclass':
-                # The superclass node contains the type being extended
-                for superclass_child in child.children:
-                    if superclass_child.type in ['type_identifier', 'generic_type', 'scoped_type_identifier']:
-                        parent_name = source_code[superclass_child.start_byte:superclass_child.end_byte]
-                        # Clean up generics if present
-                        if '<' in parent_name:
-                            parent_name = parent_name.split('<')[0]
-                        return parent_name.strip()
+        # Field lookups are resolved natively, no walk over the class's children
+        superclass = class_node.child_by_field_name('superclass')
+        if superclass is not None:
+            # The superclass node contains the type being extended
+            for superclass_child in self._iter_children(superclass):
+                if superclass_child.type in ['type_identifier', 'generic_type', 'scoped_type_identifier']:
+                    parent_name = self._node_text(source_bytes, superclass_child)
+                    # Clean up generics if present
+                    if '<' in parent_name:
+                        parent_name = parent_name.split('<')[0]
+                    return parent_name.strip()
         return None
     
     def _get_inherited_methods(self, parent_class: str) -> List[str]:
@@ -449,16 +597,24 @@ class JavaCodeParser:
         if not self.hierarchy_map:
             return []
         
-        inherited_methods = []
+        # Each ancestor chain is resolved once per parser
+        cached = self._inherited_cache.get(parent_class)
+        if cached is not None:
+            return cached
+        # Placeholder guards against cyclic hierarchies
+        self._inherited_cache[parent_class] = []
+        
+        inherited_methods: List[str] = []
         
         # Try exact match first
-        if parent_class in self.hierarchy_map:
-            parent_info = self.hierarchy_map[parent_class]
-        else:
+        parent_info = self.hierarchy_map.get(parent_class)
+        if parent_info is None:
             # Try to find by simple name (in case of different package)
-            parent_info = None
+            parent_info = self._by_simple_name.get(parent_class)
+        if parent_info is None and '.' in parent_class:
+            # Qualified name from another package root: fall back to a suffix scan
             for class_name, info in self.hierarchy_map.items():
-                if info.get('simple_name') == parent_class or class_name.endswith(f".{parent_class}"):
+                if class_name.endswith(f".{parent_class}"):
                     parent_info = info
                     break
         
@@ -475,6 +631,7 @@ class JavaCodeParser:
             grandparent_methods = self._get_inherited_methods(parent_info['parent'])
             inherited_methods.extend(grandparent_methods)
         
+        self._inherited_cache[parent_class] = inherited_methods
         return inherited_methods
     
     def _filter_complex_types(self, parameter_types: List[str]) -> List[str]:
@@ -487,36 +644,38 @@ class JavaCodeParser:
         Returns:
             List of complex/custom types that are dependencies
         """
-        # Primitive types and common Java types to ignore
-        primitives_and_common = {
-            # Primitives
-            'int', 'Integer', 'long', 'Long', 'short', 'Short',
-            'byte', 'Byte', 'float', 'Float', 'double', 'Double',
-            'boolean', 'Boolean', 'char', 'Character',
-            'void', 'Void',
-            # Common Java types
-            'String', 'Object',
-            # Common collections (often interfaces, don't need constructors)
-            'List', 'ArrayList', 'Set', 'HashSet', 'Map', 'HashMap',
-            'Collection', 'Iterable', 'Iterator',
-            # Other common types
-            'Optional', 'Stream'
-        }
-        
-        complex_types = []
-        for param_type in parameter_types:
-            # Skip if primitive or common type
-            if param_type not in primitives_and_common:
-                # Keep custom types
-                complex_types.append(param_type)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_complex_types = []
-        for t in complex_types:
-            if t not in seen:
-                seen.add(t)
-                unique_complex_types.append(t)
-        
-        return unique_complex_types
+        return list(_complex_types(tuple(parameter_types)))
+
+
+# Parser owned by each parse worker process (set up by init_parse_worker).
+# The workers live here rather than in main_ingest so a spawned process only
+# needs tree-sitter to unpickle them.
+_worker_parser: Optional[JavaCodeParser] = None
+
+
+def init_parse_worker(shm_name: str, size: int):
+    """
+    Pool initializer: attach to the shared hierarchy map and build this
+    process's parser once. The map is unpickled from shared memory, so
+    workers never re-read or re-parse project_hierarchy.json from disk.
+    """
+    global _worker_parser
+    
+    # The pipeline owns and unlinks the segment; on Python 3.13+ workers skip
+    # registering it with the resource tracker so recycled workers don't
+    # leave "leaked shared_memory" warnings behind
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        hierarchy_map = pickle.loads(shm.buf[:size])
+    finally:
+        shm.close()
+    
+    _worker_parser = JavaCodeParser(hierarchy_map=hierarchy_map)
+
 
+def parse_file_worker(file_path: str) -> List[Dict[str, Any]]:
+    """Parse a single file inside a worker process."""
+    return _worker_parser.parse_file(file_path)
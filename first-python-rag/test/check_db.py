@@ -5,6 +5,8 @@ Quick script to check database health and contents.
 import sys
 from pathlib import Path
 
+import orjson
+
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from database.vector_store import VectorStore
@@ -40,6 +42,18 @@ def check_database():
         print("   Run: python main_ingest.py")
         return
     
+    # Databases ingested before auto-indexing (or below the threshold at the
+    # time) are searched by brute force; index them once here
+    print(f"   Vector index: {'yes' if stats.get('has_vector_index') else 'no'}")
+    threshold = vector_store.auto_index_threshold
+    if not stats.get('has_vector_index') and threshold and stats['count'] >= threshold:
+        print(f"\n🔧 Building ANN index ({vector_store.index_type}) over {stats['count']} vectors...")
+        try:
+            vector_store.build_index()
+            print("✓ Index built")
+        except Exception as e:
+            print(f"⚠️  Index build failed, search stays brute-force: {e}")
+    
     # Test search
     print(f"\n3️⃣ Testing search functionality...")
     try:
@@ -50,10 +64,9 @@ def check_database():
             print(f"\n📋 Sample Result:")
             result = results[0]
             
-            # Parse metadata
-            import json
+            # Parse metadata (search() has usually decoded it already)
             if 'metadata' in result:
-                meta = json.loads(result['metadata'])
+                meta = result.get('metadata_parsed') or orjson.loads(result['metadata'])
                 print(f"   Method: {meta.get('method_name', 'N/A')}")
                 print(f"   Package: {meta.get('package', 'N/A')}")
                 print(f"   Signature: {meta.get('signature', 'N/A')[:60]}...")
@@ -4,7 +4,7 @@ Simple demo script to show parsed Java methods.
 
 import sys
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -36,8 +36,7 @@ def main():
     
     # Save to JSON for inspection
     output_file = Path(__file__).parent / "parsed_output.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2)
+    output_file.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     print(f"\n\nFull output saved to: {output_file}")
     print("\nTest completed successfully!")
@@ -0,0 +1,26 @@
+package com.example.nested;
+
+public class Outer {
+    private int count;
+
+    public Outer(int count) {
+        this.count = count;
+    }
+
+    public Runnable task() {
+        return new Runnable() {
+            @Override
+            public void run() {
+                System.out.println("running " + count);
+            }
+        };
+    }
+
+    public static class Inner {
+        private String label;
+
+        public String describe() {
+            return "Inner " + label;
+        }
+    }
+}
@@ -3,10 +3,16 @@ Test context-aware enrichment with inheritance scenario.
 Verifies that inherited methods are included in prompts.
 """
 
+import re
 import sys
 import asyncio
 from pathlib import Path
-import json
+import orjson
+
+try:
+    import uvloop  # libuv event loop; not available on Windows
+except ImportError:
+    uvloop = None
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -14,6 +20,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 from parser.java_parser import JavaCodeParser
 from embedding.enricher import CodeEnricher
 
+# Markers a context-aware prompt must contain, found in one pass over the prompt
+_PROMPT_MARKERS = {
+    "Package name": "Package:",
+    "Class context": "Class Context:",
+    "Method signature": "Method Signature:",
+    "Dependencies": "Dependencies:",
+    "Inherited methods": "Inherited Methods",
+    "Business logic focus": "BUSINESS LOGIC",
+}
+_MARKER_RE = re.compile("|".join(re.escape(m) for m in _PROMPT_MARKERS.values()))
+
 
 async def test_context_aware_enrichment():
     """Test enricher with inheritance context (Dog extends Animal)."""
@@ -33,7 +50,7 @@ async def test_context_aware_enrichment():
     # Build hierarchy (if not already exists)
     if not hierarchy_file.exists():
         print("Building hierarchy map...")
-        build_project_map(str(test_dir), str(hierarchy_file))
+        build_project_map(str(test_dir), str(hierarchy_file), use_cache=False)
     else:
         print(f"Using existing hierarchy file: {hierarchy_file}")
     
@@ -68,7 +85,8 @@ async def test_context_aware_enrichment():
     # Build and display a sample prompt
     if dog_chunks:
         sample_chunk = dog_chunks[0]
-        sample_prompt = enricher._build_prompt(sample_chunk)
+        system_msg, user_msg = enricher._build_prompt(sample_chunk)
+        sample_prompt = system_msg + "\n" + user_msg
         
         print("\n📋 Sample Prompt Generated:")
         print("─" * 80)
@@ -76,14 +94,10 @@ async def test_context_aware_enrichment():
         print("─" * 80)
         
         # Check prompt includes key elements
-        checks = {
-            "Package name": "Package:" in sample_prompt,
-            "Class context": "Class Context:" in sample_prompt,
-            "Method signature": "Method Signature:" in sample_prompt,
-            "Dependencies": "Dependencies:" in sample_prompt,
-            "Inherited methods": "Inherited Methods" in sample_prompt if has_inheritance else True,
-            "Business logic focus": "BUSINESS LOGIC" in sample_prompt
-        }
+        found = set(_MARKER_RE.findall(sample_prompt))
+        checks = {name: marker in found for name, marker in _PROMPT_MARKERS.items()}
+        if not has_inheritance:
+            checks["Inherited methods"] = True
         
         print("\n✅ Prompt Quality Checks:")
         for check, passed in checks.items():
@@ -114,8 +128,7 @@ async def test_context_aware_enrichment():
     
     # Save results
     output_file = test_dir / "context_aware_enrichment.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(enriched_chunks, f, indent=2)
+    output_file.write_bytes(orjson.dumps(enriched_chunks, option=orjson.OPT_INDENT_2))
     
     print(f"\n📄 Results saved to: {output_file}")
     
@@ -136,4 +149,5 @@ async def test_context_aware_enrichment():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_context_aware_enrichment())
+    run = uvloop.run if uvloop is not None else asyncio.run
+    run(test_context_aware_enrichment())
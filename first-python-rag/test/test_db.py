@@ -5,7 +5,7 @@ Tests with mock data including inheritance and dependencies.
 
 import sys
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -189,14 +189,14 @@ def test_vector_store():
         metadata_json = first_result.get('metadata', '')
         
         try:
-            metadata_parsed = json.loads(metadata_json)
+            metadata_parsed = orjson.loads(metadata_json)
             print("Metadata JSON structure:")
             for key in ['package', 'signature', 'dependencies', 'inherited_methods', 'file_path']:
                 value = metadata_parsed.get(key, 'missing')
                 print(f"  {key}: {value}")
             
             print("\n✓ Metadata JSON is valid and contains all required fields")
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             print("❌ Metadata is not valid JSON")
     
     print("\n" + "=" * 80)
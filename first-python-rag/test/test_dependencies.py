@@ -4,7 +4,7 @@ Test script for dependency tracking and constructor extraction.
 
 import sys
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -142,11 +142,10 @@ def test_dependencies_and_constructors():
     
     # Save results
     output_file = test_dir / "dependency_test_results.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'transaction_class': transaction_results,
-            'processor_class': processor_results
-        }, f, indent=2)
+    output_file.write_bytes(orjson.dumps({
+        'transaction_class': transaction_results,
+        'processor_class': processor_results
+    }, option=orjson.OPT_INDENT_2))
     
     print(f"\n📄 Detailed results saved to: {output_file}")
     
@@ -5,7 +5,7 @@ Test script for code enrichment module.
 import sys
 import asyncio
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -37,7 +37,7 @@ async def test_enrichment():
     print("─" * 80)
     print("Running in MOCK MODE (no API calls)")
     
-    enricher = CodeEnricher(mock_mode=True, max_concurrent=3)
+    enricher = CodeEnricher(mock_mode=True)
     enriched_chunks = await enricher.enrich_batch(chunks)
     
     print(f"\nEnriched {len(enriched_chunks)} chunks")
@@ -65,16 +65,15 @@ async def test_enrichment():
     print(f"All chunks have keywords: {has_keywords}")
     
     # Count constructors
-    constructors = [c for c in enriched_chunks if c['method_name'] == '<Constructor>']
-    methods = [c for c in enriched_chunks if c['method_name'] != '<Constructor>']
+    constructors = sum(c['method_name'] == '<Constructor>' for c in enriched_chunks)
+    methods = len(enriched_chunks) - constructors
     
-    print(f"Constructors enriched: {len(constructors)}")
-    print(f"Methods enriched: {len(methods)}")
+    print(f"Constructors enriched: {constructors}")
+    print(f"Methods enriched: {methods}")
     
     # Save enriched chunks
     output_file = Path(__file__).parent / "enriched_chunks.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(enriched_chunks, f, indent=2)
+    output_file.write_bytes(orjson.dumps(enriched_chunks, option=orjson.OPT_INDENT_2))
     
     print(f"\n📄 Enriched chunks saved to: {output_file}")
     
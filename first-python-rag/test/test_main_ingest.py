@@ -65,5 +65,123 @@ async def test_pipeline():
     print("=" * 80)
 
 
+def test_keyless_run_does_not_cache_mock_enrichments(monkeypatch, tmp_path):
+    """Without an API key the enricher falls back to mock mode; its placeholder
+    summaries must not reach enrichment_cache.pkl for later real runs."""
+    from parser.java_parser import JavaCodeParser
+    
+    monkeypatch.setenv("OPENAI_API_KEY", "")
+    pipeline = IngestionPipeline(
+        root_path=str(Path(__file__).parent / "dependency_test"),
+        db_path=str(tmp_path / "lancedb"),
+        mock_enrichment=False
+    )
+    pipeline.init_enricher()
+    assert pipeline.enricher.mock_mode
+    
+    widget = Path(__file__).parent / "dependency_test" / "Widget.java"
+    chunks = JavaCodeParser().parse_file(str(widget))
+    for chunk in chunks:
+        chunk['file_path'] = str(widget)
+    
+    pipeline.cache_checkpoint_every = 1  # Any new enrichment would trigger a save
+    enriched = asyncio.run(pipeline.flush_buffer(chunks))
+    
+    assert len(enriched) == len(chunks)
+    assert not pipeline.enrichment_cache_path.exists()
+
+
+def test_accessors_share_enrichment_across_classes(tmp_path):
+    """Identical getX bodies in different classes hash alike unless their
+    inherited methods differ."""
+    from main_ingest import _content_hash
+    from parser.java_parser import JavaCodeParser
+    
+    sources = {
+        "Point.java": "public class Point { private int x; public int getX() { return x; } }",
+        "Pixel.java": "public class Pixel { private int x; private int rgb; public int getX() { return x; } }",
+        "Sprite.java": "public class Sprite extends Pixel { private int x; public int getX() { return x; } }",
+    }
+    hashes = {}
+    parser = JavaCodeParser(hierarchy_map={"Pixel": {"parent": None, "methods": ["getX"]}})
+    for name, source in sources.items():
+        path = tmp_path / name
+        path.write_text(source)
+        [chunk] = parser.parse_file(str(path))
+        hashes[name] = _content_hash(chunk, "model\0v1")
+    
+    assert hashes["Point.java"] == hashes["Pixel.java"]
+    assert hashes["Sprite.java"] != hashes["Pixel.java"]
+
+
+def test_incremental_manifest(tmp_path):
+    """plan_incremental/_save_manifest: skip unchanged files, re-queue edits
+    and their subclasses, and only record files whose chunks were all stored."""
+    import os
+    
+    src = tmp_path / "src"
+    files = {}
+    for name, body in {
+        "Base": "class Base {}",
+        "Child": "class Child extends Base {}",
+        "a.Handler": "package a; class Handler extends Base {}",
+        "b.Handler": "package b; class Handler extends Base {}",
+        "Touched": "class Touched {}",
+        "Gone": "class Gone {}",
+        "Short": "class Short {}",
+    }.items():
+        files[name] = src.joinpath(*name.split(".")).with_suffix(".java")
+        files[name].parent.mkdir(parents=True, exist_ok=True)
+        files[name].write_text(body)
+    
+    hierarchy_map = {
+        name: {
+            "parent": "Base" if "extends Base" in files[name].read_text() else None,
+            "simple_name": name.rsplit(".", 1)[-1],
+            "file": str(path)
+        }
+        for name, path in files.items()
+    }
+    
+    def plan(java_files):
+        pipeline = IngestionPipeline(root_path=str(src), db_path=str(tmp_path / "lancedb"))
+        pipeline._hierarchy_map = hierarchy_map
+        changed, stale = pipeline.plan_incremental(java_files)
+        return pipeline, {str(p) for p in changed}, set(stale)
+    
+    # First run: everything is new; Short stores one chunk fewer than it parsed
+    pipeline, changed, _ = plan(list(files.values()))
+    assert changed == {str(p) for p in files.values()}
+    for key in changed:
+        pipeline._parsed_chunks[key] = pipeline._stored_chunks[key] = 1
+    pipeline._parsed_chunks[str(files["Short"])] = 2
+    pipeline._save_manifest()
+    assert str(files["Short"]) not in pipeline._manifest
+    
+    # Second run: touch one file, edit the superclass, delete another
+    stat = os.stat(files["Touched"])
+    os.utime(files["Touched"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    files["Base"].write_text("class Base { void run() {} }")
+    files["Gone"].unlink()
+    remaining = [p for name, p in files.items() if name != "Gone"]
+    
+    pipeline, changed, stale = plan(remaining)
+    assert str(files["Touched"]) not in changed
+    assert str(files["Base"]) in changed and str(files["Base"]) in stale
+    # Subclasses of the edited superclass are cascaded, including both
+    # classes that share the simple name Handler
+    assert str(files["Child"]) in changed
+    assert str(files["a.Handler"]) in changed and str(files["b.Handler"]) in changed
+    assert str(files["Short"]) in changed  # Never recorded, so still new
+    assert str(files["Gone"]) in stale
+    
+    # Third run with nothing changed on disk: everything is recorded now
+    for key in changed:
+        pipeline._parsed_chunks[key] = pipeline._stored_chunks[key] = 1
+    pipeline._save_manifest()
+    _, changed, stale = plan(remaining)
+    assert changed == set() and stale == set()
+
+
 if __name__ == "__main__":
     asyncio.run(test_pipeline())
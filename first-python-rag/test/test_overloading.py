@@ -4,7 +4,7 @@ Test script for verifying method overloading handling in JavaCodeParser.
 
 import sys
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -37,18 +37,13 @@ def test_overloading():
         print(f"✓ Parsing complete! Found {len(results)} public methods")
     except Exception as e:
         print(f"\n❌ ERROR during parsing:")
-        print(f"   {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return
+        print(f"   {type(e).__name__}: {e}")
+        raise
     
     # Group methods by name to show overloading
     methods_by_name = {}
     for method in results:
-        name = method['method_name']
-        if name not in methods_by_name:
-            methods_by_name[name] = []
-        methods_by_name[name].append(method)
+        methods_by_name.setdefault(method['method_name'], []).append(method)
     
     # Display results
     print("\n" + "=" * 80)
@@ -88,21 +83,20 @@ def test_overloading():
     print("=" * 80)
     
     # Find test() overloads
-    test_methods = [m for m in results if m['method_name'] == 'test']
+    test_methods = methods_by_name.get('test', [])
     print(f"\n'test' method has {len(test_methods)} overloads:")
     for i, method in enumerate(test_methods, 1):
         print(f"{i}. {method['method_signature']}")
     
     # Find calculate() overloads
-    calc_methods = [m for m in results if m['method_name'] == 'calculate']
+    calc_methods = methods_by_name.get('calculate', [])
     print(f"\n'calculate' method has {len(calc_methods)} overloads:")
     for i, method in enumerate(calc_methods, 1):
         print(f"{i}. {method['method_signature']}")
     
     # Save detailed output
     output_file = Path(__file__).parent / "overload_test_output.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2)
+    output_file.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     print(f"\n\nDetailed output saved to: {output_file}")
     
@@ -40,10 +40,8 @@ def test_parser():
         print(f"✓ Parsing complete! Found {len(results)} public methods")
     except Exception as e:
         print(f"\n❌ ERROR during parsing:")
-        print(f"   {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return
+        print(f"   {type(e).__name__}: {e}")
+        raise
     
     # Display results
     print("\n" + "=" * 80)
@@ -5,7 +5,7 @@ Test enricher with real OpenAI API.
 import sys
 import asyncio
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -41,7 +41,8 @@ async def test_real_api():
     print("─" * 80)
     print("Calling OpenAI API (gpt-4o-mini)...")
     
-    enricher = CodeEnricher(mock_mode=False, model='gpt-4o-mini')
+    # Pack every chunk of a class into one request
+    enricher = CodeEnricher(mock_mode=False, model='gpt-4o-mini', chunks_per_request=len(chunks_to_enrich))
     enriched_chunks = await enricher.enrich_batch(chunks_to_enrich)
     
     # Display results
@@ -56,8 +57,7 @@ async def test_real_api():
     
     # Save results
     output_file = Path(__file__).parent / "real_api_enrichment.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(enriched_chunks, f, indent=2)
+    output_file.write_bytes(orjson.dumps(enriched_chunks, option=orjson.OPT_INDENT_2))
     
     print(f"\n📄 Results saved to: {output_file}")
     
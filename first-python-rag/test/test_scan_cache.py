@@ -0,0 +1,79 @@
+"""
+Test the hierarchy scanner's SQLite cache.
+A stale entry silently gives chunks the wrong inheritance context, so edits,
+touches, deletions and cache version bumps are all checked here.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import parser.hierarchy_scanner as hierarchy_scanner
+from parser.hierarchy_scanner import HierarchyScanner
+
+
+def test_scan_cache(tmp_path, monkeypatch):
+    """Only new, edited and (after a version bump) all files are re-parsed."""
+    project = tmp_path / "project"
+    project.mkdir()
+    cache_dir = tmp_path / "cache"
+    (project / "Animal.java").write_text("public class Animal { public void eat() {} }")
+    (project / "Dog.java").write_text("public class Dog extends Animal { public void bark() {} }")
+    (project / "Cat.java").write_text("public class Cat extends Animal { public void meow() {} }")
+    
+    parsed = []
+    scan_file = HierarchyScanner._scan_file
+    
+    def recording_scan_file(self, file_path):
+        parsed.append(file_path.name)
+        return scan_file(self, file_path)
+    
+    monkeypatch.setattr(HierarchyScanner, "_scan_file", recording_scan_file)
+    
+    def scan():
+        parsed.clear()
+        return HierarchyScanner().build_project_map(
+            str(project),
+            str(tmp_path / "hierarchy.json"),
+            max_workers=1,
+            cache_dir=str(cache_dir)
+        )
+    
+    # First scan parses everything; a repeat scan parses nothing
+    scan()
+    assert sorted(parsed) == ["Animal.java", "Cat.java", "Dog.java"]
+    hierarchy_map = scan()
+    assert parsed == []
+    assert hierarchy_map["Dog"]["methods"] == ["bark"]
+    
+    # Touched but identical: served from the cache
+    stat = os.stat(project / "Cat.java")
+    os.utime(project / "Cat.java", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    # Edited: re-parsed, and the new methods and parent are picked up
+    (project / "Dog.java").write_text("public class Dog { public void fetch() {} }")
+    # Deleted: its classes leave the map
+    (project / "Animal.java").unlink()
+    
+    hierarchy_map = scan()
+    assert parsed == ["Dog.java"]
+    assert hierarchy_map["Dog"]["parent"] is None
+    assert hierarchy_map["Dog"]["methods"] == ["fetch"]
+    assert "Animal" not in hierarchy_map
+    
+    # Nothing changed since: every file is a cache hit again
+    scan()
+    assert parsed == []
+    
+    # A deleted file that comes back is parsed again, not served from the cache
+    (project / "Animal.java").write_text("public class Animal { public void sleep() {} }")
+    hierarchy_map = scan()
+    assert parsed == ["Animal.java"]
+    assert hierarchy_map["Animal"]["methods"] == ["sleep"]
+    
+    # A newer cache layout drops every entry
+    monkeypatch.setattr(hierarchy_scanner, "_CACHE_VERSION", hierarchy_scanner._CACHE_VERSION + 1)
+    scan()
+    assert sorted(parsed) == ["Animal.java", "Cat.java", "Dog.java"]
@@ -31,13 +31,16 @@ async def test_search():
         "constructor"
     ]
     
-    for query in test_queries:
+    # Run all queries concurrently, then report them in order
+    all_results = await asyncio.gather(*[
+        search_engine.search(query, limit=3, expand=False) for query in test_queries
+    ])
+    
+    for query, results in zip(test_queries, all_results):
         print(f"\n{'='* 80}")
         print(f"Testing Query: \"{query}\"")
         print("=" * 80)
         
-        results = await search_engine.search(query, limit=3, expand=False)
-        
         if results:
             print(f"\nFound {len(results)} results:")
             for i, result in enumerate(results, 1):
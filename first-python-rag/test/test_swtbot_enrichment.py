@@ -5,8 +5,10 @@ Verifies quality of semantic summaries and keywords.
 
 import sys
 import asyncio
+from collections import Counter
+from itertools import chain
 from pathlib import Path
-import json
+import orjson
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -54,7 +56,13 @@ async def test_swtbot_enrichment():
     print("─" * 80)
     print("Calling OpenAI API...")
     
-    enricher = CodeEnricher(mock_mode=False, model='gpt-4o-mini', max_concurrent=3)
+    # Pack every chunk of a class into one request
+    enricher = CodeEnricher(
+        mock_mode=False,
+        model='gpt-4o-mini',
+        requests_per_minute=500,
+        chunks_per_request=len(chunks_to_enrich)
+    )
     enriched_chunks = await enricher.enrich_batch(chunks_to_enrich)
     
     print(f"\nEnriched {len(enriched_chunks)} methods successfully")
@@ -88,31 +96,24 @@ async def test_swtbot_enrichment():
     print(f"All methods have keywords: {has_keywords}")
     
     # Check for business logic focus (not implementation details)
-    implementation_keywords = ['return', 'takes', 'integer', 'string', 'variable']
-    business_focused = []
-    
-    for chunk in enriched_chunks:
-        summary = chunk.get('summary', '').lower()
-        is_business = not any(keyword in summary for keyword in implementation_keywords)
-        business_focused.append(is_business)
-    
-    business_count = sum(business_focused)
+    implementation_keywords = ('return', 'takes', 'integer', 'string', 'variable')
+    summaries = [chunk.get('summary', '').lower() for chunk in enriched_chunks]
+    business_count = sum(
+        not any(keyword in summary for keyword in implementation_keywords)
+        for summary in summaries
+    )
     print(f"Business logic focused summaries: {business_count}/{len(enriched_chunks)}")
     
     # Check keyword diversity
-    all_keywords = []
-    for chunk in enriched_chunks:
-        all_keywords.extend(chunk.get('keywords', []))
-    
-    unique_keywords = set(all_keywords)
-    print(f"Total keywords: {len(all_keywords)}")
-    print(f"Unique keywords: {len(unique_keywords)}")
-    print(f"Diversity ratio: {len(unique_keywords)/len(all_keywords):.2%}")
+    keyword_counts = Counter(chain.from_iterable(chunk.get('keywords', ()) for chunk in enriched_chunks))
+    total_keywords = sum(keyword_counts.values())
+    print(f"Total keywords: {total_keywords}")
+    print(f"Unique keywords: {len(keyword_counts)}")
+    print(f"Diversity ratio: {len(keyword_counts)/total_keywords:.2%}")
     
     # Step 5: Save results
     output_file = Path(__file__).parent / "swtbot_enrichment_results.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(enriched_chunks, f, indent=2)
+    output_file.write_bytes(orjson.dumps(enriched_chunks, option=orjson.OPT_INDENT_2))
     
     print(f"\n📄 Full results saved to: {output_file}")
     
@@ -1,44 +1,196 @@
 """
 Verification script to check if the local Jina V3 model is available and loadable.
 """
+import contextlib
+import hashlib
+import io
+import json
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from config import load_config
+
+# Same setting main_ingest.py and search.py hand to VectorStore; passed to
+# transformers as a plain string
+MODEL_PATH = load_config().jina_model_path
+
 def verify_model_path():
     """Check if the model path exists."""
-    model_path = Path(r"C:\models\huggingface\JinaV3\jina-embeddings-v3")
-    
     print("=" * 60)
     print("Verifying Local Model Setup")
     print("=" * 60)
     
-    if not model_path.exists():
+    # One directory listing answers both "does it exist" and "which files are there"
+    try:
+        entries = set(os.listdir(MODEL_PATH))
+    except (FileNotFoundError, NotADirectoryError):
         print(f"❌ ERROR: Model path does not exist!")
-        print(f"   Expected path: {model_path}")
+        print(f"   Expected path: {MODEL_PATH}")
         print(f"\n   Please ensure the Jina V3 model is downloaded to this location.")
         return False
     
-    print(f"✓ Model path exists: {model_path}")
+    print(f"✓ Model path exists: {MODEL_PATH}")
+    
+    # Cheap manifest check, so a broken download fails before importing transformers
+    required = ("config.json", "tokenizer_config.json", "tokenizer.json")
+    missing = [name for name in required if name not in entries]
+    has_weights = (
+        "model.safetensors" in entries
+        or "pytorch_model.bin" in entries
+        or any(name.startswith("model-") and name.endswith(".safetensors") for name in entries)
+    )
+    if not has_weights:
+        missing.append("model.safetensors (or pytorch_model.bin / model-*.safetensors shards)")
+    
+    if missing:
+        print(f"❌ ERROR: Model files are missing!")
+        for name in missing:
+            print(f"   - {name}")
+        return False
+    
+    print(f"✓ Model files present")
     return True
 
-def verify_model_loading():
-    """Try to load the model using HuggingFace AutoModel."""
+def verify_weights_header():
+    """Check that every safetensors shard has a readable header listing tensors."""
+    shards = sorted(Path(MODEL_PATH).glob("*.safetensors"))
+    if not shards:
+        # Only a pytorch_model.bin checkpoint; nothing to check without loading it
+        return True
+    
     try:
-        print("\nAttempting to load the model...")
-        from transformers import AutoModel, AutoTokenizer
+        from safetensors import safe_open
         
-        model_path = r"C:\models\huggingface\JinaV3\jina-embeddings-v3"
+        # Reads only the JSON header of each shard, never the tensor data
+        total = 0
+        for shard in shards:
+            with safe_open(str(shard), framework="numpy") as f:
+                count = len(f.keys())
+            if count == 0:
+                print(f"❌ ERROR: {shard.name} declares no tensors")
+                return False
+            total += count
         
-        # Try loading the tokenizer
-        print("  - Loading tokenizer...")
-        tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
-        print("    ✓ Tokenizer loaded successfully")
+    except Exception as e:
+        print(f"❌ ERROR: Unreadable weights file!")
+        print(f"   {type(e).__name__}: {e}")
+        return False
+    
+    print(f"✓ Weights header valid: {len(shards)} shard(s), {total} tensors")
+    return True
+
+def _verification_key(model_path: Path, deep: bool) -> str:
+    """
+    Fingerprint of a passed verification.
+    It changes with the transformers version, the check depth and the
+    mtime/size of config.json and the weights, so any update re-runs the checks.
+    """
+    from importlib.metadata import PackageNotFoundError, version
+    
+    try:
+        transformers_version = version("transformers")
+    except PackageNotFoundError:
+        transformers_version = "missing"  # Never cached: verify_model_loading will fail
+    
+    parts = [transformers_version, "deep" if deep else "graph"]
+    for path in sorted([model_path / "config.json", *model_path.glob("*.safetensors"), *model_path.glob("*.bin")]):
+        stat = path.stat()
+        parts.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+def _marker_path(model_path: Path, deep: bool) -> Path:
+    """
+    File holding the last passed verification key for this model and depth.
+    Lives in the tool's cache dir, one file per model path, and is
+    overwritten on each pass so nothing accumulates.
+    """
+    model_key = hashlib.sha256(str(model_path.resolve()).encode()).hexdigest()[:16]
+    depth = "deep" if deep else "graph"
+    return Path(load_config().cache_dir) / "verified" / f"{model_key}_{depth}"
+
+def _write_marker(marker: Path, key: str):
+    """Record a passed verification; failures only mean verifying again next time."""
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.write_text(key)
+    except OSError:
+        pass
+
+def _prefetch_weights(model_path: str):
+    """Ask the kernel to start reading the weight files into the page cache (Linux/macOS only)."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for shard in Path(model_path).glob("*.safetensors"):
+        try:
+            fd = os.open(shard, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass  # Only a hint; the load reports real errors
+
+def _build_empty_model(model_path: str):
+    """Build the model from its config on the meta device (no weights are read)."""
+    import torch
+    from transformers import AutoConfig, AutoModel
+    
+    config = AutoConfig.from_pretrained(model_path, trust_remote_code=True)
+    with torch.device("meta"):
+        return AutoModel.from_config(config, trust_remote_code=True)
+
+@lru_cache(maxsize=2)
+def _load(model_path: str, weights: bool = True):
+    """
+    Load the tokenizer and model once per path.
+    Callers that verify repeatedly in one process reuse the loaded pair.
+    """
+    # Disk reads overlap the transformers import and model construction
+    if weights:
+        _prefetch_weights(model_path)
+    
+    from concurrent.futures import ThreadPoolExecutor
+    from transformers import AutoModel, AutoTokenizer
+    
+    # Independent file reads: load the tokenizer while the model loads
+    print("  - Loading tokenizer and model...")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        tokenizer_future = pool.submit(AutoTokenizer.from_pretrained, model_path, trust_remote_code=True, use_fast=True)
+        if weights:
+            # dtype="auto" keeps the checkpoint's stored precision instead of upcasting to FP32
+            model_future = pool.submit(AutoModel.from_pretrained, model_path, trust_remote_code=True, dtype="auto")
+        else:
+            model_future = pool.submit(_build_empty_model, model_path)
         
-        # Try loading the model
-        print("  - Loading model...")
-        model = AutoModel.from_pretrained(model_path, trust_remote_code=True)
-        print("    ✓ Model loaded successfully")
+        tokenizer = tokenizer_future.result()
+        print("    ✓ Tokenizer loaded successfully")
+        if not tokenizer.is_fast:
+            # transformers falls back to the Python tokenizer when tokenizer.json is unusable
+            print("    ⚠️  Using the slow Python tokenizer; check tokenizer.json")
+        model = model_future.result()
+        if weights:
+            print("    ✓ Model loaded successfully")
+        else:
+            print("    ✓ Model built successfully (weights not read; use --deep to load them)")
+    
+    return tokenizer, model
+
+def verify_model_loading(deep: bool = False):
+    """
+    Try to load the model using HuggingFace AutoModel.
+    
+    Args:
+        deep: Also read the weights; otherwise only the config, tokenizer
+              and model classes are checked (the graph is built on the meta device)
+    """
+    try:
+        print("\nAttempting to load the model...")
+        tokenizer, model = _load(MODEL_PATH, weights=deep)
         
         print(f"\n✓ Model verification complete!")
         print(f"  Model type: {type(model).__name__}")
@@ -62,19 +214,85 @@ def verify_model_loading():
         print(f"   - Missing model configuration files")
         return False
 
-def main():
-    """Main verification routine."""
-    # Check path
-    if not verify_model_path():
-        sys.exit(1)
+def _run_checks(deep: bool, force: bool) -> dict:
+    """
+    Run the checks in order, stopping at the first failure.
+    
+    Args:
+        deep: Also load the weights
+        force: Ignore a cached pass
+        
+    Returns:
+        Per-stage results (None = stage not reached) and overall 'ok'
+    """
+    result = {
+        "model_path": MODEL_PATH,
+        "deep": deep,
+        "model_files_ok": None,
+        "cached": False,
+        "weights_header_ok": None,
+        "model_ok": None,
+        "ok": False,
+    }
+    
+    # Check path and files first: transformers/torch (seconds to import) are
+    # only imported inside verify_model_loading, so failures here stay fast
+    result["model_files_ok"] = verify_model_path()
+    if not result["model_files_ok"]:
+        return result
+    
+    # Unchanged model files already passed this check
+    marker = _marker_path(Path(MODEL_PATH), deep)
+    key = _verification_key(Path(MODEL_PATH), deep)
+    try:
+        cached = marker.read_text() == key
+    except OSError:
+        cached = False
+    if cached and not force:
+        print(f"✓ Cached verification ({marker}); use --force to re-run")
+        result["cached"] = result["ok"] = True
+        return result
+    
+    # Check the weights' headers (a few KB per shard) before any model code runs
+    result["weights_header_ok"] = verify_weights_header()
+    if not result["weights_header_ok"]:
+        return result
     
     # Check model loading
-    if not verify_model_loading():
+    result["model_ok"] = verify_model_loading(deep=deep)
+    if not result["model_ok"]:
+        return result
+    
+    _write_marker(marker, key)
+    
+    result["ok"] = True
+    return result
+
+def main():
+    """
+    Main verification routine.
+    Flags: --deep loads the weights, --force ignores a cached pass,
+    --json prints one JSON summary instead of the step-by-step report.
+    """
+    args = sys.argv[1:]
+    deep = '--deep' in args
+    force = '--force' in args
+    
+    if '--json' in args:
+        # Step-by-step output is for people; CI gets a single line
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = _run_checks(deep, force)
+        print(json.dumps(result))
+        sys.exit(0 if result["ok"] else 1)
+    
+    result = _run_checks(deep, force)
+    if not result["ok"]:
         sys.exit(1)
     
-    print("\n" + "=" * 60)
-    print("✓ All verification checks passed!")
-    print("=" * 60)
+    if not result["cached"]:
+        print("\n" + "=" * 60)
+        print("✓ All verification checks passed!")
+        print("=" * 60)
     sys.exit(0)
 
 if __name__ == "__main__":